@@ -0,0 +1,196 @@
+# patternDatabase.py
+# ------------------
+# Pattern databases: exact goal distances in an abstraction of a search
+# problem, used as admissible heuristics (see searchAgents.py).
+
+
+"""
+A pattern database maps every state of an abstract version of a search problem
+to its exact cost-to-goal in the abstraction, which is an admissible (and
+consistent) heuristic for the real problem.
+
+An Abstraction numbers its abstract states and can list the predecessors of
+one; PatternDatabase.build runs a backward BFS from the abstract goals over
+them and keeps the costs in an array('H').  save writes the costs to disk
+behind a small header and load maps such a file back with mmap, so a
+database is built once per layout and pattern and opened for free later.
+getPatternDatabase does all of that behind an in-memory cache.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import deque
+import util
+
+class Abstraction:
+    """
+    The outline of an abstraction of a search problem, with unit-cost moves.
+
+    You do not need to change anything in this class, ever.
+    """
+
+    def size(self):
+        "Returns the number of abstract states; they are numbered 0 .. size() - 1."
+        util.raiseNotDefined()
+
+    def goalIndices(self):
+        "Returns the numbers of the abstract goal states."
+        util.raiseNotDefined()
+
+    def predecessors(self, index):
+        "Returns the numbers of the abstract states with a move into state index."
+        util.raiseNotDefined()
+
+    def key(self):
+        "Returns bytes that identify this abstraction, to name its database."
+        util.raiseNotDefined()
+
+class PositionMaskAbstraction(Abstraction):
+    """
+    Pacman's position plus which of a few target cells still have to be
+    visited; walking onto a target ticks it off.  The abstract goals are the
+    states with no target left, wherever Pacman is.
+
+    With the four corners as targets this is the whole CornersProblem; with a
+    subset of the dots as targets it is the FoodSearchProblem with every other
+    dot ignored.  Abstract state number index(cell, mask) = cell * 2^k + mask,
+    where bit i of mask is set while targets[i] is still to be visited.
+    """
+
+    def __init__(self, walls, targets):
+        self.walls = walls
+        self.targets = tuple(targets)
+        self.cells = [(x, y) for x in range(walls.width) for y in range(walls.height) if not walls[x][y]]
+        self.cellIndex = {cell: i for i, cell in enumerate(self.cells)}
+        self.neighbours = [[self.cellIndex[(x + dx, y + dy)] for dx, dy in ((0, 1), (0, -1), (1, 0), (-1, 0)) if not walls[x + dx][y + dy]]
+                           for x, y in self.cells]
+        self.targetBits = [0] * len(self.cells) # CELL NUMBER -> ITS BIT IN THE MASK (0 FOR NON-TARGETS)
+        for i, target in enumerate(self.targets):
+            if target in self.cellIndex:
+                self.targetBits[self.cellIndex[target]] = 1 << i
+        self.bits = len(self.targets)
+
+    def size(self):
+        return len(self.cells) << self.bits
+
+    def index(self, cell, mask):
+        return (self.cellIndex[cell] << self.bits) | mask
+
+    def goalIndices(self):
+        return [cell << self.bits for cell in range(len(self.cells))]
+
+    def predecessors(self, index):
+        cell, mask = index >> self.bits, index & ((1 << self.bits) - 1)
+        bit = self.targetBits[cell]
+        if bit and mask & bit: # EVERY MOVE ONTO A TARGET TICKS IT OFF, SO NO MOVE LEADS HERE (ONLY A START STATE CAN BE LIKE THIS)
+            return []
+        shifted = [neighbour << self.bits for neighbour in self.neighbours[cell]]
+        if not bit:
+            return [neighbour | mask for neighbour in shifted]
+        return [neighbour | m for neighbour in shifted for m in (mask, mask | bit)] # THE TARGET MAY HAVE BEEN VISITED BEFORE OR JUST NOW
+
+    def key(self):
+        return repr((self.walls.packBits(), self.targets)).encode()
+
+class PatternDatabase:
+    """
+    The cost-to-goal of every abstract state of an Abstraction, as unsigned
+    16-bit numbers (UNREACHABLE where no goal can be reached).
+
+    The file format is a HEADER_SIZE byte header (magic, byte order, number
+    of entries and the SHA-1 of the abstraction's key) followed by the raw
+    array, so load can map it without parsing or copying anything.
+    """
+
+    UNREACHABLE = 0xFFFF
+    MAGIC = b'PDB1'
+    HEADER = struct.Struct('<4scxxxQ20s')
+    HEADER_SIZE = 64 # PADDED SO THAT THE COSTS START ALIGNED
+
+    def __init__(self, costs, digest, mapping=None):
+        self.costs = costs # AN array('H') OR A memoryview OVER A MAPPED FILE
+        self.digest = digest
+        self.mapping = mapping # KEEPS THE mmap OPEN WHILE costs POINTS INTO IT
+
+    def __len__(self):
+        return len(self.costs)
+
+    def __getitem__(self, index):
+        return self.costs[index]
+
+    @classmethod
+    def build(cls, abstraction):
+        """
+        Returns the database of abstraction, from a backward BFS that starts
+        at all abstract goals at once.
+        """
+        costs = array('H', [cls.UNREACHABLE]) * abstraction.size()
+        queue = deque()
+        for goal in abstraction.goalIndices():
+            costs[goal] = 0
+            queue.append(goal)
+        predecessors = abstraction.predecessors
+        while queue:
+            index = queue.popleft()
+            cost = costs[index] + 1
+            for previous in predecessors(index):
+                if costs[previous] == cls.UNREACHABLE:
+                    costs[previous] = cost
+                    queue.append(previous)
+        return cls(costs, hashlib.sha1(abstraction.key()).digest())
+
+    def save(self, path):
+        header = self.HEADER.pack(self.MAGIC, sys.byteorder[0].encode(), len(self.costs), self.digest)
+        with open(path, 'wb') as f:
+            f.write(header.ljust(self.HEADER_SIZE, b'\0'))
+            f.write(self.costs.tobytes())
+
+    @classmethod
+    def load(cls, path, abstraction):
+        """
+        Maps the database saved at path, or returns None if the file was
+        written for another abstraction or on a machine of another byte order.
+        """
+        with open(path, 'rb') as f:
+            header = f.read(cls.HEADER_SIZE)
+            if len(header) < cls.HEADER_SIZE:
+                return None
+            magic, byteorder, size, digest = cls.HEADER.unpack_from(header)
+            if (magic != cls.MAGIC or byteorder != sys.byteorder[0].encode() or size != abstraction.size()
+                    or digest != hashlib.sha1(abstraction.key()).digest()):
+                return None
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mapping) != cls.HEADER_SIZE + 2 * size: # A TRUNCATED FILE
+            mapping.close()
+            return None
+        costs = memoryview(mapping)[cls.HEADER_SIZE:].cast('H')
+        return cls(costs, digest, mapping)
+
+_databases = {} # SHA-1 OF AN ABSTRACTION'S KEY -> ITS PatternDatabase
+
+def getPatternDatabase(abstraction, cacheDir=None):
+    """
+    Returns the PatternDatabase of abstraction, building it only the first
+    time it is asked for in this process.  With a cacheDir the database is
+    also mapped from (or, the first time, saved to) a file in that directory,
+    so later runs do not build it again.
+    """
+    digest = hashlib.sha1(abstraction.key()).digest()
+    database = _databases.get(digest)
+    if database is not None:
+        return database
+    if cacheDir is not None:
+        path = os.path.join(cacheDir, 'pdb-%s.bin' % digest.hex()[:16])
+        if os.path.exists(path):
+            database = PatternDatabase.load(path, abstraction)
+        if database is None:
+            database = PatternDatabase.build(abstraction)
+            database.save(path)
+    else:
+        database = PatternDatabase.build(abstraction)
+    _databases[digest] = database
+    return database
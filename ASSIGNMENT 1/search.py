@@ -17,6 +17,10 @@ In search.py, you will implement generic search algorithms which are called by
 Pacman agents (in searchAgents.py).
 """
 
+import heapq
+import json
+import time
+from collections import OrderedDict
 import util
 from game import Directions
 from typing import List
@@ -75,6 +79,198 @@ def tinyMazeSearch(problem: SearchProblem) -> List[Directions]:
     w = Directions.WEST
     return  [s, s, w, s, w, w, s, w]
 
+class SearchNode:
+    """
+    A node of the search tree: a state, the action that reached it, the cost
+    of the path so far and a pointer to the parent node.
+
+    Pushing a node costs O(1) no matter how deep it is, since the action list
+    is only rebuilt (by following the parent pointers) once a goal is popped.
+    """
+
+    __slots__ = ('state', 'parent', 'action', 'cost')
+
+    def __init__(self, state, parent=None, action=None, cost=0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.cost = cost
+
+    def path(self) -> List[Directions]:
+        """
+        Returns the list of actions that leads from the root to this node.
+        """
+        actions = []
+        node = self
+        while node.parent is not None: # WALK BACK TO THE ROOT
+            actions.append(node.action)
+            node = node.parent
+        actions.reverse() # THE ACTIONS WERE COLLECTED GOAL-FIRST
+        return actions
+
+class LazyPriorityQueue:
+    """
+    A priority queue with the same push/pop/isEmpty/update interface as
+    util.PriorityQueue that also supports decrease-key.
+
+    Every item has a key (by default the item itself).  Pushing an item whose
+    key is already queued does not touch the old entry; the old entry is just
+    marked as superseded and is thrown away when it reaches the top of the
+    heap (lazy deletion).  stalePops counts how many such entries were skipped.
+    """
+
+    def __init__(self, key=lambda item: item):
+        self.heap = []
+        self.count = 0
+        self.key = key
+        self.entries = {} # KEY -> (COUNT, PRIORITY) OF THE ONLY LIVE ENTRY FOR THAT KEY
+        self.stalePops = 0
+
+    def push(self, item, priority):
+        heapq.heappush(self.heap, (priority, self.count, item))
+        self.entries[self.key(item)] = (self.count, priority) # ANY OLDER ENTRY FOR THIS KEY IS NOW STALE
+        self.count += 1
+
+    def pop(self):
+        while self.heap:
+            _, count, item = heapq.heappop(self.heap)
+            key = self.key(item)
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == count: # THE LIVE ENTRY FOR THIS KEY
+                del self.entries[key]
+                return item
+            self.stalePops += 1 # SUPERSEDED BY A LATER PUSH, SKIP IT
+        raise IndexError('pop from an empty priority queue')
+
+    def isEmpty(self):
+        return not self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, item):
+        return self.key(item) in self.entries
+
+    def update(self, item, priority):
+        # IF THE KEY IS QUEUED WITH A HIGHER PRIORITY, DECREASE IT; IF IT IS
+        # QUEUED WITH A LOWER OR EQUAL PRIORITY, DO NOTHING; OTHERWISE PUSH IT
+        entry = self.entries.get(self.key(item))
+        if entry is None or priority < entry[1]:
+            self.push(item, priority)
+
+class SearchStats:
+    """
+    Counters for one search, filled in by an InstrumentedProblem, by the
+    heuristic returned from instrumentHeuristic and by the search functions
+    themselves (peak frontier size).
+
+      generated       successors returned by getSuccessors
+      expanded        calls to getSuccessors
+      reopened        expansions of a state that had already been expanded
+      peakFrontier    largest frontier seen before an expansion (dfs, bfs,
+                      ucs and astar report it; 0 for the others)
+      goalTests       calls to isGoalState
+      heuristicCalls  calls to the heuristic, heuristicTime their total time
+      successorTime   total time spent inside getSuccessors
+
+    jumpPointSearch reads the walls itself instead of calling getSuccessors,
+    so only its goal tests are counted here.
+    """
+
+    def __init__(self):
+        self.generated = 0
+        self.expanded = 0
+        self.reopened = 0
+        self.peakFrontier = 0
+        self.goalTests = 0
+        self.heuristicCalls = 0
+        self.heuristicTime = 0.0
+        self.successorTime = 0.0
+        self.extra = {} # FREE-FORM FIELDS ADDED BY THE CALLER (LAYOUT, SEARCH NAME, COST, ...)
+
+    def observeFrontier(self, size):
+        if size > self.peakFrontier:
+            self.peakFrontier = size
+
+    def asDict(self):
+        stats = {
+            'generated': self.generated,
+            'expanded': self.expanded,
+            'reopened': self.reopened,
+            'peakFrontier': self.peakFrontier,
+            'goalTests': self.goalTests,
+            'heuristicCalls': self.heuristicCalls,
+            'heuristicTime': self.heuristicTime,
+            'successorTime': self.successorTime,
+        }
+        stats.update(self.extra)
+        return stats
+
+    def toJSON(self):
+        return json.dumps(self.asDict(), sort_keys=True)
+
+class InstrumentedProblem:
+    """
+    Wraps a search problem and records a SearchStats (in searchStats) for
+    every getSuccessors and isGoalState call.  Every other attribute is read
+    from and written to the wrapped problem, so heuristics and the counters
+    the searches leave behind (_expanded, _stalePops, ...) keep working.
+
+    Searches only look for problem.searchStats, so a plain problem costs
+    nothing extra.
+    """
+
+    def __init__(self, problem, stats=None):
+        object.__setattr__(self, 'problem', problem)
+        object.__setattr__(self, 'searchStats', stats if stats is not None else SearchStats())
+        object.__setattr__(self, 'expandedStates', set())
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.problem, name, value)
+
+    def getStartState(self):
+        return self.problem.getStartState()
+
+    def isGoalState(self, state):
+        self.searchStats.goalTests += 1
+        return self.problem.isGoalState(state)
+
+    def getSuccessors(self, state):
+        stats = self.searchStats
+        start = time.perf_counter()
+        successors = self.problem.getSuccessors(state)
+        stats.successorTime += time.perf_counter() - start
+        stats.expanded += 1
+        stats.generated += len(successors)
+        if state in self.expandedStates:
+            stats.reopened += 1
+        else:
+            self.expandedStates.add(state)
+        return successors
+
+    def getCostOfActions(self, actions):
+        return self.problem.getCostOfActions(actions)
+
+def instrumentHeuristic(heuristic, problem):
+    """
+    Returns heuristic wrapped so that its calls and time are added to
+    problem.searchStats, or heuristic itself if problem is not instrumented.
+    """
+    stats = getattr(problem, 'searchStats', None)
+    if stats is None:
+        return heuristic
+
+    def timedHeuristic(state, problem=None):
+        start = time.perf_counter()
+        value = heuristic(state, problem)
+        stats.heuristicTime += time.perf_counter() - start
+        stats.heuristicCalls += 1
+        return value
+    return timedHeuristic
+
 def depthFirstSearch(problem: SearchProblem) -> List[Directions]:
     """
     Search the deepest nodes in the search tree first.
@@ -91,22 +287,25 @@ def depthFirstSearch(problem: SearchProblem) -> List[Directions]:
     """
     frontier = util.Stack() # STACK = PROJECT REQUIREMENT
     start_state = problem.getStartState() # GET THE STARTING STATE OF THE CURRENT PROBLEM
-    frontier.push((start_state, []))  # STORE THE STARTING STATE AND AN EMPTY PATH [AVOIDING ERRORS]
+    frontier.push(SearchNode(start_state))  # STORE THE STARTING STATE AS THE ROOT NODE (EMPTY PATH)
     
     explored = set() # USE A SET TO STORE THE EXPLORED STATES
+    stats = getattr(problem, 'searchStats', None) # ONLY SET ON AN InstrumentedProblem
     
     while not frontier.isEmpty(): #MAIN DFS LOOP
-        state, path = frontier.pop() # POP A NODE
+        if stats is not None:
+            stats.observeFrontier(len(frontier.list))
+        node = frontier.pop() # POP A NODE
+        state = node.state
         if problem.isGoalState(state): # IF THE STATE IS THE FOOD, RETURN THE APPROPRIATE PATH AS INSTRUCTED
-            return path
+            return node.path()
         
         if state not in explored: # IF A STATE ISNT IN THE EXPLORED SET,
             explored.add(state) # ADD IT
             
             for successor, action, _ in problem.getSuccessors(state): # CHECK THE SUCCESSORS OF THE CURRENT STATE, IGNORE IF THEYRE EXPLORED
                 if successor not in explored: # [AVOID EXPLORED STATES AS INSTRUCTED IN THE PROJECT]
-                    new_path = path + [action] # ADD THE ACTION TO THE PATH
-                    frontier.push((successor, new_path)) # GET THE NEW PATH INTO THE STACK
+                    frontier.push(SearchNode(successor, node, action)) # ONLY A POINTER TO THE PARENT, NO PATH COPY
     
     # NO FEASIBLE SOLUTION
     return []
@@ -115,46 +314,207 @@ def breadthFirstSearch(problem: SearchProblem) -> List[Directions]:
     """Search the shallowest nodes in the search tree first."""
     frontier = util.Queue()
     start_state = problem.getStartState()
-    frontier.push((start_state, []))  
+    frontier.push(SearchNode(start_state))  
     
-    explored = set()
+    reached = {start_state} # EVERY STATE THAT WAS EVER ENQUEUED (FRONTIER + EXPLORED), HASHED FOR O(1) MEMBERSHIP
+    stats = getattr(problem, 'searchStats', None)
     
     while not frontier.isEmpty(): 
-        state, path = frontier.pop()
+        if stats is not None:
+            stats.observeFrontier(len(frontier.list))
+        node = frontier.pop()
+        state = node.state
         if problem.isGoalState(state):
-            return path
+            return node.path()
         
-        if state not in explored:
-            explored.add(state)
-            
-            for successor, action, _ in problem.getSuccessors(state): # SAME CONCEPT SO FAR
-                if successor not in explored and successor not in [s for s, _ in frontier.list]: # CHECK IF THE SUCCESSOR IS IN THE FRONTIER, QUEUE VERSION FOR BFS
-                    new_path = path + [action]
-                    frontier.push((successor, new_path))
+        for successor, action, _ in problem.getSuccessors(state): # SAME CONCEPT SO FAR
+            if successor not in reached: # NEITHER EXPLORED NOR WAITING IN THE QUEUE, NO NEED TO SCAN THE FRONTIER
+                reached.add(successor)
+                frontier.push(SearchNode(successor, node, action))
     
     return []
 
 def uniformCostSearch(problem: SearchProblem) -> List[Directions]:
     """Search the node of least total cost first."""
-    frontier = util.PriorityQueue()
+    frontier = LazyPriorityQueue(key=lambda node: node.state) # ONE LIVE ENTRY PER STATE, CHEAPER PATHS REPLACE OLDER ONES
     start_state = problem.getStartState()
-    frontier.push((start_state, []), 0)  # PRIORITY ADDED 
+    frontier.push(SearchNode(start_state), 0)  # PRIORITY ADDED 
     
     currentcost = {start_state: 0} # DICTIONARY FOR COSTS
+    stats = getattr(problem, 'searchStats', None)
     
     while not frontier.isEmpty(): # SAME CONCEPT:
-        state, path = frontier.pop()
+        if stats is not None:
+            stats.observeFrontier(len(frontier))
+        node = frontier.pop() # STALE ENTRIES ARE SKIPPED BY THE QUEUE, SO NO STATE IS EXPANDED TWICE
+        state = node.state
         if problem.isGoalState(state):
-            return path
+            problem._stalePops = frontier.stalePops
+            return node.path()
         
         for successor, action, step_cost in problem.getSuccessors(state): # INCLUDE THE STEP COST
-            new_cost = currentcost[state] + step_cost # ADD THE STEP COST TO THE CURRENT COST
+            new_cost = node.cost + step_cost # ADD THE STEP COST TO THE COST OF THE POPPED NODE
             if successor not in currentcost or new_cost < currentcost[successor]: # IF THE SUCCESSOR ISNT IN THE CURRENT COST OR THE NEW COST IS LESS THAN THE CURRENT COST
                 currentcost[successor] = new_cost # UPDATE THE COST ACCORDINGLY
-                new_path = path + [action] 
-                frontier.push((successor, new_path), new_cost)
+                frontier.push(SearchNode(successor, node, action, new_cost), new_cost) # DECREASE-KEY
+    problem._stalePops = frontier.stalePops
     return []
 
+def bidirectionalSearch(problem: SearchProblem) -> List[Directions]:
+    """
+    Search breadth-first from the start and from the goal at the same time,
+    one whole layer at a time (always the smaller side), and stop at the first
+    layer where the two searches meet.  For a point-to-point query this
+    expands two small balls instead of one big one.
+
+    The problem must have a single goal, returned by problem.getGoalState()
+    (None if there is no single goal), and reversible unit-cost moves: if (t, a, 1) is a successor of s, then
+    (s, Directions.REVERSE[a], 1) is a successor of t.  Both sides expand
+    through problem.getSuccessors, so problem._expanded counts both of them.
+    """
+    if not hasattr(problem, 'getGoalState'):
+        raise AttributeError('bidirectionalSearch needs a problem with a getGoalState method.')
+    start_state = problem.getStartState()
+    goal_state = problem.getGoalState()
+    if goal_state is None:
+        raise AttributeError('bidirectionalSearch needs a problem with a single goal state.')
+
+    forward = {start_state: SearchNode(start_state)} # REACHED STATES OF EACH SIDE -> THEIR NODES
+    backward = {goal_state: SearchNode(goal_state)}
+    forward_layer, backward_layer = [start_state], [goal_state]
+    meeting = start_state if start_state == goal_state else None
+
+    while meeting is None and forward_layer and backward_layer:
+        if len(forward_layer) <= len(backward_layer): # GROW THE SMALLER SIDE
+            layer, reached, other = forward_layer, forward, backward
+        else:
+            layer, reached, other = backward_layer, backward, forward
+
+        next_layer = []
+        best = None
+        for state in layer:
+            node = reached[state]
+            for successor, action, _ in problem.getSuccessors(state):
+                if successor in reached:
+                    continue
+                child = SearchNode(successor, node, action, node.cost + 1)
+                reached[successor] = child
+                next_layer.append(successor)
+                if successor in other: # THE SIDES MEET; KEEP THE SHORTEST MEETING OF THIS LAYER
+                    total = child.cost + other[successor].cost
+                    if best is None or total < best:
+                        best, meeting = total, successor
+
+        if reached is forward:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+
+    if meeting is None: # NO FEASIBLE SOLUTION
+        return []
+
+    path = forward[meeting].path()
+    node = backward[meeting]
+    while node.parent is not None: # THE BACKWARD NODES POINT TOWARDS THE GOAL, UNDO THEIR MOVES
+        path.append(Directions.REVERSE[node.action])
+        node = node.parent
+    return path
+
+def jumpPointSearch(problem: SearchProblem) -> List[Directions]:
+    """
+    Jump Point Search for 4-connected grid mazes with unit step costs, such as
+    the PositionSearchProblem and AnyFoodSearchProblem of searchAgents.py.  The
+    problem must have a walls Grid and (x, y) states; if it has a single goal
+    position in problem.goal, the Manhattan distance to it guides the search.
+
+    Shortest grid paths are only considered in one canonical form: vertical
+    runs may turn sideways anywhere, horizontal runs only turn where a wall
+    behind the turn makes it necessary.  Horizontal runs therefore jump over
+    cells until such a "forced" turn or a goal, and vertical runs until a
+    sideways jump from them finds something.  Only the cells where the search
+    stops (jump points) are pushed onto the frontier, so far fewer nodes are
+    expanded, and each expanded jump point counts in problem._expanded.  The
+    returned path is just as short as the one of BFS or UCS.
+    """
+    walls = problem.walls
+    isGoal = problem.isGoalState
+    goal = getattr(problem, 'goal', None)
+    if goal is not None:
+        estimate = lambda x, y: abs(x - goal[0]) + abs(y - goal[1])
+    else:
+        estimate = lambda x, y: 0
+
+    def jumpHorizontal(x, y, dx):
+        while True:
+            x += dx
+            if walls[x][y]:
+                return None
+            if isGoal((x, y)):
+                return (x, y)
+            if (not walls[x][y + 1] and walls[x - dx][y + 1]) or (not walls[x][y - 1] and walls[x - dx][y - 1]): # FORCED TURN
+                return (x, y)
+
+    def jumpVertical(x, y, dy):
+        while True:
+            y += dy
+            if walls[x][y]:
+                return None
+            if isGoal((x, y)) or jumpHorizontal(x, y, 1) or jumpHorizontal(x, y, -1): # A SIDEWAYS RUN FROM HERE LEADS SOMEWHERE
+                return (x, y)
+
+    def directions(x, y, arrival):
+        if arrival is None: # THE START, TRY EVERYTHING
+            return [(0, 1), (0, -1), (1, 0), (-1, 0)]
+        dx, dy = arrival
+        if dx: # KEEP GOING AND TAKE THE FORCED TURNS ONLY
+            return [(dx, 0)] + [(0, side) for side in (1, -1) if not walls[x][y + side] and walls[x - dx][y + side]]
+        return [(0, dy), (1, 0), (-1, 0)] # KEEP GOING OR TURN SIDEWAYS
+
+    start_state = problem.getStartState()
+    if isGoal(start_state):
+        return []
+    frontier = LazyPriorityQueue(key=lambda node: node.state)
+    frontier.push(SearchNode((start_state, None)), 0) # A NODE STATE IS (POSITION, ARRIVAL DIRECTION)
+    currentcost = {(start_state, None): 0}
+
+    while not frontier.isEmpty():
+        node = frontier.pop()
+        (x, y), arrival = node.state
+        if node.parent is not None and isGoal((x, y)):
+            return _unfoldJumps([n.state[0] for n in _nodeChain(node)])
+        if hasattr(problem, '_expanded'):
+            problem._expanded += 1
+        for dx, dy in directions(x, y, arrival):
+            point = jumpHorizontal(x, y, dx) if dx else jumpVertical(x, y, dy)
+            if point is None:
+                continue
+            new_cost = node.cost + abs(point[0] - x) + abs(point[1] - y)
+            key = (point, (dx, dy))
+            if key not in currentcost or new_cost < currentcost[key]:
+                currentcost[key] = new_cost
+                frontier.push(SearchNode(key, node, (dx, dy), new_cost), new_cost + estimate(*point))
+
+    return []
+
+def _nodeChain(node):
+    "Returns the nodes from the root of the search tree down to node."
+    chain = []
+    while node is not None:
+        chain.append(node)
+        node = node.parent
+    chain.reverse()
+    return chain
+
+_vectorDirections = {(0, 1): Directions.NORTH, (0, -1): Directions.SOUTH, (1, 0): Directions.EAST, (-1, 0): Directions.WEST}
+
+def _unfoldJumps(points) -> List[Directions]:
+    "Turns a list of jump points, each in a straight line from the last, into unit moves."
+    actions = []
+    for (x1, y1), (x2, y2) in zip(points, points[1:]):
+        dx, dy = (x2 > x1) - (x2 < x1), (y2 > y1) - (y2 < y1)
+        actions.extend([_vectorDirections[(dx, dy)]] * (abs(x2 - x1) + abs(y2 - y1)))
+    return actions
+
 def nullHeuristic(state, problem=None) -> float:
     """
     A heuristic function estimates the cost from the current state to the nearest
@@ -162,30 +522,333 @@ def nullHeuristic(state, problem=None) -> float:
     """
     return 0
 
-def aStarSearch(problem: SearchProblem, heuristic=nullHeuristic) -> List[Directions]:
-    """Search the node that has the lowest combined cost and heuristic first."""
-    frontier = util.PriorityQueue()
+class HeuristicCache:
+    """
+    Wraps a heuristic in a bounded LRU cache keyed by search state, so that an
+    expensive heuristic is only computed once per distinct state (as long as
+    the state stays among the maxSize most recently used ones).
+
+    A cache belongs to a single search problem.  hits and misses count the
+    lookups that were answered from the cache and the ones that were not.
+    """
+
+    def __init__(self, heuristic, maxSize=100000):
+        self.heuristic = heuristic
+        self.maxSize = maxSize
+        self.values = OrderedDict() # STATE -> HEURISTIC VALUE, LEAST RECENTLY USED FIRST
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, state, problem=None):
+        values = self.values
+        if state in values:
+            self.hits += 1
+            values.move_to_end(state) # MOST RECENTLY USED NOW
+            return values[state]
+        self.misses += 1
+        value = self.heuristic(state, problem)
+        values[state] = value
+        if len(values) > self.maxSize:
+            values.popitem(last=False) # EVICT THE LEAST RECENTLY USED STATE
+        return value
+
+def aStarSearch(problem: SearchProblem, heuristic=nullHeuristic, tieBreak='fifo', consistent=False, heuristicCacheSize=0) -> List[Directions]:
+    """
+    Search the node that has the lowest combined cost and heuristic first.
+
+    tieBreak decides which of the nodes with equal f = g + h is expanded first:
+      'fifo'           the one that was generated first
+      'lifo'           the one that was generated last
+      'highG', 'lowH'  the one closest to a goal (lowest h, i.e. highest g),
+                       then the one that was generated last
+
+    With consistent=True the heuristic is trusted to be consistent: a state is
+    closed the first time it is popped and is never reopened, even if a
+    cheaper path to it shows up later.  This is only optimal for consistent
+    heuristics.
+
+    With heuristicCacheSize > 0 the heuristic is wrapped in a HeuristicCache of
+    that size; its hit and miss counts end up in problem._heuristicHits and
+    problem._heuristicMisses.
+    """
+    if tieBreak == 'fifo':
+        makePriority = lambda f, h, order: f # THE QUEUE ALREADY BREAKS TIES IN PUSH ORDER
+    elif tieBreak == 'lifo':
+        makePriority = lambda f, h, order: (f, -order)
+    elif tieBreak in ('highG', 'lowH'):
+        makePriority = lambda f, h, order: (f, h, -order) # SAME f, LOWER h <=> HIGHER g
+    else:
+        raise ValueError('Unknown tie-breaking rule for aStarSearch: ' + str(tieBreak))
+    if heuristicCacheSize:
+        heuristic = HeuristicCache(heuristic, heuristicCacheSize)
+
+    frontier = LazyPriorityQueue(key=lambda node: node.state)
     start_state = problem.getStartState()
-    frontier.push((start_state, []), 0) 
+    frontier.push(SearchNode(start_state), makePriority(0, 0, 0)) 
     
     currentcost = {start_state: 0}
+    closed = set() # ONLY USED IN CONSISTENT MODE
+    order = 0 # NUMBER OF PUSHES SO FAR, FOR LIFO TIE-BREAKING
+    path = [] # STAYS EMPTY IF THERE IS NO FEASIBLE SOLUTION
+    stats = getattr(problem, 'searchStats', None)
     
     while not frontier.isEmpty():
-        state, path = frontier.pop()
+        if stats is not None:
+            stats.observeFrontier(len(frontier))
+        node = frontier.pop()
+        state = node.state
         if problem.isGoalState(state):
-            return path
+            path = node.path()
+            break
+        if consistent:
+            closed.add(state) # THE FIRST POP OF A STATE IS OPTIMAL FOR A CONSISTENT HEURISTIC
         for successor, action, step_cost in problem.getSuccessors(state):
-            new_cost = currentcost[state] + step_cost
-            if successor not in currentcost or new_cost < currentcost[successor]:
+            if successor in closed: # NEVER REOPEN A CLOSED STATE
+                continue
+            new_cost = node.cost + step_cost
+            if successor not in currentcost or new_cost < currentcost[successor]: # A CHEAPER PATH REOPENS THE STATE EVEN IF IT WAS EXPANDED
                 currentcost[successor] = new_cost
-                priority = new_cost + heuristic(successor, problem) # ADD THE HEURISTIC TO THE PRIORITY
-                new_path = path + [action]
-                frontier.push((successor, new_path), priority)
+                h = heuristic(successor, problem)
+                order += 1
+                priority = makePriority(new_cost + h, h, order) # ADD THE HEURISTIC TO THE PRIORITY
+                frontier.push(SearchNode(successor, node, action, new_cost), priority)
     
-    return []
+    problem._stalePops = frontier.stalePops
+    if heuristicCacheSize:
+        problem._heuristicHits, problem._heuristicMisses = heuristic.hits, heuristic.misses
+    return path
+
+def iterativeDeepeningAStarSearch(problem: SearchProblem, heuristic=nullHeuristic) -> List[Directions]:
+    """
+    IDA*: depth-first searches that cut off every node whose f = g + h exceeds
+    a bound, starting with h(start) and raising the bound to the smallest f
+    that was cut off, until a goal is found.
+
+    Only the current path (and the successor iterators along it) is kept in
+    memory, so memory grows with the solution depth, not with the number of
+    generated nodes; the price is that nodes are expanded again in every
+    iteration (each expansion counts in problem._expanded).  Optimal for
+    admissible heuristics.  Repeated states are only pruned along the
+    current path, so on open layouts with many equally cheap routes the
+    number of expansions can grow exponentially.
+    """
+    start_state = problem.getStartState()
+    if problem.isGoalState(start_state):
+        return []
+    bound = heuristic(start_state, problem)
+
+    while True:
+        next_bound = float('inf') # THE SMALLEST f THAT WAS CUT OFF IN THIS ITERATION
+        on_path = {start_state} # ONLY THE STATES ON THE CURRENT PATH, TO AVOID CYCLES
+        stack = [(SearchNode(start_state), iter(problem.getSuccessors(start_state)))]
+
+        while stack:
+            node, successors = stack[-1]
+            for successor, action, step_cost in successors:
+                if successor in on_path:
+                    continue
+                new_cost = node.cost + step_cost
+                f = new_cost + heuristic(successor, problem)
+                if f > bound: # CUT OFF, BUT REMEMBER HOW FAR THE BOUND MUST GO TO SEE IT
+                    next_bound = min(next_bound, f)
+                    continue
+                child = SearchNode(successor, node, action, new_cost)
+                if problem.isGoalState(successor): # f <= bound, SO NO CHEAPER GOAL IS LEFT
+                    return child.path()
+                on_path.add(successor)
+                stack.append((child, iter(problem.getSuccessors(successor)))) # GO DEEPER FIRST
+                break
+            else: # ALL SUCCESSORS DONE, BACKTRACK
+                stack.pop()
+                on_path.discard(node.state)
+
+        if next_bound == float('inf'): # NOTHING WAS CUT OFF, NO FEASIBLE SOLUTION
+            return []
+        bound = next_bound
+
+class MemoryBoundedNode(SearchNode):
+    """
+    A SearchNode of memoryBoundedAStarSearch, which also keeps its f value,
+    depth and children in memory, and, for every successor that is not in
+    memory, what is needed to generate it again together with the lowest f
+    known below it: forgotten for the ones it lost to the budget, skipped for
+    the ones another node in memory reached at least as cheaply (these become
+    forgotten once that node is).
+    """
+
+    __slots__ = ('f', 'depth', 'children', 'forgotten', 'skipped', 'expanded', 'inMemory', 'version')
+
+    def __init__(self, state, parent=None, action=None, cost=0, f=0, depth=0):
+        SearchNode.__init__(self, state, parent, action, cost)
+        self.f = f
+        self.depth = depth
+        self.children = []
+        self.forgotten = {} # SUCCESSOR STATE -> (ACTION, STEP COST, f) OF A SUCCESSOR NOT IN MEMORY
+        self.skipped = {} # THE SAME, FOR SUCCESSORS SKIPPED AS DUPLICATES
+        self.expanded = False
+        self.inMemory = True
+        self.version = 0 # HEAP ENTRIES WITH AN OLDER VERSION ARE STALE
+
+    def value(self):
+        """
+        The lowest f this node can still lead to without the children it has
+        in memory: its own f until it is expanded, then the lowest f of its
+        forgotten successors.
+        """
+        if not self.expanded:
+            return self.f
+        return min([entry[2] for entry in self.forgotten.values()] or [float('inf')])
+
+def memoryBoundedAStarSearch(problem: SearchProblem, heuristic=nullHeuristic, maxNodes=10000) -> List[Directions]:
+    """
+    A* that never keeps more than maxNodes search nodes in memory (SMA*-style).
+
+    When an expansion goes over the budget, the leaves with the highest f
+    (shallowest first) are forgotten.  Their parent remembers the f of each
+    one it lost and stays on the open list with the lowest of them, so a
+    forgotten subtree competes with everything still in memory and is
+    regenerated, one successor at a time, as soon as it is the most promising.
+    Nodes too deep for the budget are dropped, and if nothing with a finite
+    f is left the search gives up and returns [].  Optimal for admissible
+    heuristics whenever the budget can hold an optimal path.
+
+    A successor is not generated while a path to its state that is at least
+    as cheap is in memory; if that node is forgotten later, the skipped
+    successor becomes a forgotten successor of the node that skipped it, if
+    that one is still in memory (if it is not, the forgotten node's parent
+    keeps a bound for its state that is at least as low).  maxNodes must be
+    at least 2.
+    """
+    if maxNodes < 2:
+        raise Exception('memoryBoundedAStarSearch needs maxNodes >= 2, not ' + str(maxNodes))
+    inf = float('inf')
+    best_heap, worst_heap = [], [] # OPEN NODES ORDERED FOR POPPING, LEAVES ORDERED FOR FORGETTING
+    counter = [0]
+
+    def refile(node):
+        # PUTS node BACK ON THE HEAPS IT BELONGS ON AFTER IT CHANGED
+        node.version += 1
+        counter[0] += 1
+        value = node.value()
+        if not node.expanded or node.forgotten: # IT CAN STILL GENERATE SOMETHING
+            heapq.heappush(best_heap, (value, -node.depth, counter[0], node.version, node)) # LOWEST f, DEEPEST FIRST
+        if not node.children and node.parent is not None: # A LEAF OF THE TREE IN MEMORY
+            heapq.heappush(worst_heap, (-value, node.depth, counter[0], node.version, node)) # HIGHEST f, SHALLOWEST FIRST
+
+    def pop_node(heap, protected=None):
+        skipped = None
+        while heap:
+            entry = heapq.heappop(heap)
+            node = entry[4]
+            if not node.inMemory or entry[3] != node.version: # STALE ENTRY
+                continue
+            if node is protected:
+                skipped = entry
+                continue
+            if skipped is not None:
+                heapq.heappush(heap, skipped)
+            return node
+        if skipped is not None:
+            heapq.heappush(heap, skipped)
+        return None
+
+    def generate(node, successor):
+        # MOVES A FORGOTTEN SUCCESSOR OF node INTO MEMORY; RETURNS THE NEW CHILD, OR None IF IT WAS SKIPPED
+        action, step_cost, f = node.forgotten.pop(successor)
+        new_cost = node.cost + step_cost
+        known = in_memory.get(successor)
+        if known is not None and known.cost <= new_cost: # A PATH AT LEAST AS CHEAP IS ALREADY IN MEMORY
+            node.skipped[successor] = (action, step_cost, f)
+            skipped_by.setdefault(successor, []).append(node)
+            return None
+        child = MemoryBoundedNode(successor, node, action, new_cost, f, node.depth + 1)
+        node.children.append(child)
+        in_memory[successor] = child
+        refile(child)
+        return child
+
+    def forget(node):
+        # DROPS A LEAF FROM MEMORY, LEAVING ITS BEST f WITH ITS PARENT
+        node.inMemory = False
+        parent = node.parent
+        parent.children.remove(node)
+        value = node.value()
+        if value < inf:
+            parent.forgotten[node.state] = (node.action, node.cost - parent.cost, value)
+        if in_memory.get(node.state) is node:
+            del in_memory[node.state]
+            for skipper in skipped_by.pop(node.state, ()): # THEIR PATHS TO IT ARE NO LONGER COVERED
+                if skipper.inMemory and node.state in skipper.skipped:
+                    skipper.forgotten[node.state] = skipper.skipped.pop(node.state)
+                    refile(skipper)
+        refile(parent)
+
+    start_state = problem.getStartState()
+    root = MemoryBoundedNode(start_state, f=heuristic(start_state, problem))
+    in_memory = {start_state: root} # STATE -> ITS CHEAPEST NODE IN MEMORY
+    skipped_by = {} # STATE -> THE NODES THAT SKIPPED IT BECAUSE OF ITS NODE IN MEMORY
+    refile(root)
+    used = 1 # NODES IN MEMORY
+
+    while True:
+        node = pop_node(best_heap)
+        if node is None or node.value() == inf: # NOTHING REACHABLE WITHIN THE BUDGET
+            return []
+
+        if node.expanded: # REGENERATE THE MOST PROMISING FORGOTTEN SUCCESSOR
+            successor = min(node.forgotten, key=lambda state: node.forgotten[state][2])
+            children = [generate(node, successor)]
+        else:
+            if problem.isGoalState(node.state):
+                return node.path()
+            ancestors = set()
+            ancestor = node
+            while ancestor is not None:
+                ancestors.add(ancestor.state)
+                ancestor = ancestor.parent
+            node.expanded = True
+            for successor, action, step_cost in problem.getSuccessors(node.state):
+                if successor in ancestors:
+                    continue
+                new_cost = node.cost + step_cost
+                f = max(node.f, new_cost + heuristic(successor, problem)) # PATHMAX
+                if node.depth + 1 >= maxNodes - 1 and not problem.isGoalState(successor): # NO ROOM TO GO DEEPER
+                    continue
+                node.forgotten[successor] = (action, step_cost, f)
+            children = [generate(node, successor) for successor in list(node.forgotten)]
+
+        children = [child for child in children if child is not None]
+        used += len(children)
+        if not node.children and not node.forgotten: # A DEAD END, NO GOAL CAN BE FOUND BELOW IT
+            if node.parent is None:
+                return []
+            forget(node)
+            used -= 1
+            continue
+        refile(node)
+
+        protected = min(children, key=lambda child: child.f) if children else None # KEEP AT LEAST THE BEST NEW CHILD
+        while used > maxNodes:
+            victim = pop_node(worst_heap, protected)
+            if victim is None:
+                return []
+            forget(victim)
+            used -= 1
+
+def consistentAStarSearch(problem: SearchProblem, heuristic=nullHeuristic) -> List[Directions]:
+    """
+    A* for consistent heuristics: closes states on their first pop and breaks
+    f ties towards the goal, which keeps the expansions on open mazes low.
+    """
+    return aStarSearch(problem, heuristic, tieBreak='highG', consistent=True)
 
 # Abbreviations
 bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
+castar = consistentAStarSearch
+idastar = iterativeDeepeningAStarSearch
+smastar = memoryBoundedAStarSearch
 ucs = uniformCostSearch
+bibfs = bidirectionalSearch
+jps = jumpPointSearch
@@ -35,13 +35,22 @@ Good luck and happy searching!
 """
 
 from typing import List, Tuple, Any
+from array import array
+from collections import deque
 from game import Directions
 from game import Agent
 from game import Actions
+from game import Grid
 import util
 import time
+import heapq
+import os
+import struct
+import sys
+import hashlib
 import search
 import pacman
+import patternDatabase
 
 class GoWestAgent(Agent):
     "An agent that goes West until it can't."
@@ -71,11 +80,14 @@ class SearchAgent(Agent):
       depthFirstSearch or dfs
       breadthFirstSearch or bfs
 
+    With stats set, the problem is wrapped in a search.InstrumentedProblem
+    and the search statistics are written as one JSON line, to standard
+    output for stats=stdout or appended to the file named by stats.
 
     Note: You should NOT change any code in SearchAgent
     """
 
-    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic', stats=None):
         # Warning: some advanced Python magic is employed below to find the right functions and problems
 
         # Get the search function from the name and heuristic
@@ -94,13 +106,15 @@ class SearchAgent(Agent):
                 raise AttributeError(heuristic + ' is not a function in searchAgents.py or search.py.')
             print('[SearchAgent] using function %s and heuristic %s' % (fn, heuristic))
             # Note: this bit of Python trickery combines the search algorithm and the heuristic
-            self.searchFunction = lambda x: func(x, heuristic=heur)
+            self.searchFunction = lambda x: func(x, heuristic=search.instrumentHeuristic(heur, x))
 
         # Get the search problem type from the name
         if prob not in globals().keys() or not prob.endswith('Problem'):
             raise AttributeError(prob + ' is not a search problem type in SearchAgents.py.')
         self.searchType = globals()[prob]
         print('[SearchAgent] using problem type ' + prob)
+        self.stats = stats
+        self.searchName, self.heuristicName, self.problemName = fn, heuristic, prob
 
     def registerInitialState(self, state):
         """
@@ -114,12 +128,31 @@ class SearchAgent(Agent):
         if self.searchFunction == None: raise Exception("No search function provided for SearchAgent")
         starttime = time.time()
         problem = self.searchType(state) # Makes a new search problem
-        self.actions  = self.searchFunction(problem) # Find a path
+        statsOut = getattr(self, 'stats', None) # SUBCLASSES WITH THEIR OWN __init__ NEVER SET IT
+        searched = search.InstrumentedProblem(problem) if statsOut else problem
+        self.actions  = self.searchFunction(searched) # Find a path
         if self.actions == None:
             self.actions = []
         totalCost = problem.getCostOfActions(self.actions)
         print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
+        if statsOut:
+            self.writeStats(searched.searchStats, totalCost, time.time() - starttime)
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
+        if '_stalePops' in dir(problem): print('Stale frontier entries skipped: %d' % problem._stalePops)
+        if '_heuristicHits' in dir(problem): print('Heuristic cache: %d hits, %d misses' % (problem._heuristicHits, problem._heuristicMisses))
+
+    def writeStats(self, stats, totalCost, elapsed):
+        """
+        Writes stats as one JSON line, together with what was searched and
+        the cost and wall time of the result.
+        """
+        stats.extra.update({'search': self.searchName, 'heuristic': self.heuristicName, 'problem': self.problemName,
+                            'pathLength': len(self.actions), 'cost': totalCost, 'time': elapsed})
+        if self.stats == 'stdout':
+            print(stats.toJSON())
+        else:
+            with open(self.stats, 'a') as out:
+                out.write(stats.toJSON() + '\n')
 
     def getAction(self, state):
         """
@@ -137,6 +170,65 @@ class SearchAgent(Agent):
         else:
             return Directions.STOP
 
+class LayoutCache:
+    """
+    Values that only depend on the walls of a layout, built once per layout
+    and shared by every game state and search problem that uses it.
+
+    Values are stored by the fingerprint of the walls (Grid.packBits), so equal
+    layouts share them even across different Grid objects; a Grid that was
+    already seen is found by identity without computing its fingerprint.
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self.byFingerprint = {}
+        self.byWalls = {} # id(walls) -> (walls, value); KEEPING walls ALIVE KEEPS ITS id UNIQUE
+
+    def get(self, walls, *buildArgs):
+        """
+        Returns the value for walls, calling build(walls, *buildArgs) only if
+        the layout has not been seen yet.
+        """
+        entry = self.byWalls.get(id(walls))
+        if entry is not None and entry[0] is walls:
+            return entry[1]
+        fingerprint = walls.packBits()
+        value = self.byFingerprint.get(fingerprint)
+        if value is None:
+            value = self.byFingerprint[fingerprint] = self.build(walls, *buildArgs)
+        self.byWalls[id(walls)] = (walls, value)
+        return value
+
+    def clear(self):
+        self.byFingerprint.clear()
+        self.byWalls.clear()
+
+def buildLegalMoves(walls):
+    """
+    Returns a dictionary from every free cell (x, y) to the tuple of its legal
+    moves, as ((nextx, nexty), action) pairs in North, South, East, West order.
+    """
+    moves = {}
+    for x in range(walls.width):
+        for y in range(walls.height):
+            if walls[x][y]:
+                continue
+            cellMoves = []
+            for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                dx, dy = Actions.directionToVector(action)
+                nextx, nexty = int(x + dx), int(y + dy)
+                if not walls[nextx][nexty]:
+                    cellMoves.append(((nextx, nexty), action))
+            moves[(x, y)] = tuple(cellMoves)
+    return moves
+
+_legalMoves = LayoutCache(buildLegalMoves)
+
+def getLegalMoves(walls):
+    "Returns the shared legal move table of buildLegalMoves for a wall grid."
+    return _legalMoves.get(walls)
+
 class PositionSearchProblem(search.SearchProblem):
     """
     A search problem defines the state space, start state, goal test, successor
@@ -168,9 +260,19 @@ class PositionSearchProblem(search.SearchProblem):
         # For display purposes
         self._visited, self._visitedlist, self._expanded = {}, [], 0 # DO NOT CHANGE
 
+        self.moves = getLegalMoves(self.walls) # SHARED BY ALL PROBLEMS ON THIS LAYOUT
+        self.successorCache = {} # STATE -> READY-MADE SUCCESSOR TRIPLES (THE COSTS DEPEND ON THIS PROBLEM'S costFn)
+
     def getStartState(self):
         return self.startState
 
+    def getGoalState(self):
+        """
+        Returns the single goal position (used by search.bidirectionalSearch),
+        or None for subclasses without one, such as AnyFoodSearchProblem.
+        """
+        return getattr(self, 'goal', None)
+
     def isGoalState(self, state):
         isGoal = state == self.goal
 
@@ -194,17 +296,15 @@ class PositionSearchProblem(search.SearchProblem):
          successor to the current state, 'action' is the action
          required to get there, and 'stepCost' is the incremental
          cost of expanding to that successor
+
+        The list is built once per state from the layout's legal move table
+        and reused afterwards, so callers must not modify it.
         """
 
-        successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = (nextx, nexty)
-                cost = self.costFn(nextState)
-                successors.append( ( nextState, action, cost) )
+        successors = self.successorCache.get(state)
+        if successors is None:
+            costFn = self.costFn
+            successors = self.successorCache[state] = [(nextState, action, costFn(nextState)) for nextState, action in self.moves[state]]
 
         # Bookkeeping for display purposes
         self._expanded += 1 # DO NOT CHANGE
@@ -290,24 +390,28 @@ class CornersProblem(search.SearchProblem):
                 print('Warning: no food in corner ' + str(corner))
         self._expanded = 0 # DO NOT CHANGE; Number of search nodes expanded
 
+        self.cornerBits = {corner: 1 << i for i, corner in enumerate(self.corners)} # CORNER -> ITS BIT IN THE VISITED MASK
+        self.allCorners = (1 << len(self.corners)) - 1 # THE MASK WITH EVERY CORNER VISITED
+        self.moves = getLegalMoves(self.walls) # (X, Y) -> LEGAL ((NEXTX, NEXTY), ACTION) MOVES, SHARED PER LAYOUT
+        self.heuristicInfo = {} # A DICTIONARY FOR THE HEURISTIC TO STORE INFORMATION, LIKE IN THE FoodSearchProblem
+
     def getStartState(self):
         """
         Returns the start state (in your state space, not the full Pacman state
         space)
+
+        A STATE IS A PACKED TUPLE (X, Y, MASK) WHERE BIT i OF MASK IS SET ONCE
+        self.corners[i] HAS BEEN VISITED.
         """
-        start_position = self.startingPosition # LIKE IN SEARCH.PY 
+        x, y = self.startingPosition # LIKE IN SEARCH.PY 
     
-        visited_corners = (False, False, False, False) # INITIALIZE THE CORNERS AS NOT VISITED TO DEFINE THE PROBLEM
-    
-        return (start_position, visited_corners) # RETURN THE STARTING STATE (0 CORNERS VISITED, STARTING POSITION)
+        return (x, y, 0) # RETURN THE STARTING STATE (STARTING POSITION, 0 CORNERS VISITED)
 
     def isGoalState(self, state: Any):
         """
         Returns whether this search state is a goal state of the problem.
         """
-        _, visited_corners = state # _ TO CAPTURE THE POSITION, VISITED_CORNERS TO CAPTURE THE VISITED CORNERS
-        
-        return all(visited_corners) # RETURN TRUE IF ALL CORNERS HAVE BEEN VISITED, FALSE OTHERWISE
+        return state[2] == self.allCorners # TRUE IF ALL CORNER BITS ARE SET, FALSE OTHERWISE
 
     def getSuccessors(self, state: Any):
         """
@@ -319,25 +423,11 @@ class CornersProblem(search.SearchProblem):
             state, 'action' is the action required to get there, and 'stepCost'
             is the incremental cost of expanding to that successor
         """
+        x, y, visited_corners = state # CAPTURE THE CURRENT POSITION AND VISITED CORNERS
 
-        successors = [] # DEFINE SUCCESSORS AS AN EMPTY LIST
-        current_position, visited_corners = state # CAPTURE THE CURRENT POSITION AND VISITED CORNERS
-
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]: # LOOP THROUGH THE 4 POSSIBLE ACTIONS
-            x, y = current_position # CAPTURE THE CURRENT POSITION
-            dx, dy = Actions.directionToVector(action) # CAPTURE THE DIRECTION TO MOVE IN X/Y COORDINATES TO CALCULATE THE FUTURE POSITION
-            nextx, nexty = int(x + dx), int(y + dy) # CAPTURE THE NEXT POSITION
-            
-            if not self.walls[nextx][nexty]: # CHECK IF THE NEW POSITION IS LEGAL!!! 
-                new_visited_corners = list(visited_corners) # COPY THE VISITED CORNERS
-                if (nextx, nexty) in self.corners: # CHECK IF THE NEW POSITION IS A CORNER
-                    corner_index = self.corners.index((nextx, nexty)) # GET THE INDEX OF THE CORNER
-                    new_visited_corners[corner_index] = True # SET THE CORNER AS VISITED  
-                new_visited_corners = tuple(new_visited_corners) # CONVERT THE LIST TO A TUPLE
-
-                new_state = ((nextx, nexty), new_visited_corners) # CREATE THE NEW STATE (?)
-                
-                successors.append((new_state, action, 1)) # ADD THE NEW STATE AS A NEW SUCCESSOR
+        cornerBits = self.cornerBits
+        successors = [((nextPosition[0], nextPosition[1], visited_corners | cornerBits.get(nextPosition, 0)), action, 1) # SET THE BIT IF THE NEW POSITION IS A CORNER
+                      for nextPosition, action in self.moves[(x, y)]]
 
         self._expanded += 1 # DO NOT CHANGE
         return successors
@@ -373,32 +463,46 @@ def cornersHeuristic(state: Any, problem: CornersProblem):
     corners = problem.corners # These are the corner coordinates
     walls = problem.walls # These are the walls of the maze, as a Grid (game.py)
 
-    current_position, visited_corners = state
-
-    # CREATE A LIST OF UNVISITED CORNERS
-    unvisited_corners = [corner for corner, visited in zip(corners, visited_corners) if not visited]
-
-    # IF ALL CORNERS ARE VISITED, THE HEURISTIC IS 0
-    if not unvisited_corners:
+    x, y, visited_corners = state
+    unvisited = problem.allCorners & ~visited_corners
+    if not unvisited: # IF ALL CORNERS ARE VISITED, THE HEURISTIC IS 0
         return 0
 
-    distances = [util.manhattanDistance(current_position, corner) for corner in unvisited_corners] # USE MANHATTAN DISTANCE FROM THE CURRENT POSITION TO EACH UNVISITED CORNER 
-    heuristic = min(distances) # TAKE THE MINIMUM DISTANCE TO THE ACCORDING CORNER
+    tours = problem.heuristicInfo.get('cornerTours')
+    if tours is None: # ONE TABLE PER LAYOUT, LOOKED UP ONCE PER PROBLEM
+        tours = problem.heuristicInfo['cornerTours'] = _cornerTours.get(walls, corners)
+    cell = tours.index[(x, y)]
 
-    remaining_corners = unvisited_corners[:] # COPY THE UNVISITED CORNERS LEFT TO VISIT
-    current_corner = unvisited_corners[distances.index(heuristic)] # DETERMINE WHICH CORNER TO VISIT NEXT OUT OF THE ONES LEFT
-    remaining_corners.remove(current_corner) # REMOVE THE CURRENT CORNER FROM THE REMAINING CORNERS
+    # THE EXACT REMAINING COST: WALK TO SOME UNVISITED CORNER, THEN TAKE THE SHORTEST TOUR OF THE OTHERS FROM THERE
+    return min(tours.rows[i][cell] + tours.tours[i][unvisited & ~(1 << i)]
+               for i in range(len(corners)) if unvisited >> i & 1)
 
-    while remaining_corners: # WHILE THERE ARE REMAINING CORNERS (UNVISITED)
-        distances = [util.manhattanDistance(current_corner, corner) for corner in remaining_corners] # SAME CONCEPT
-        min_distance = min(distances)
-        heuristic += min_distance # ADJUST HEURISTIC
-        current_corner = remaining_corners[distances.index(min_distance)] 
-        remaining_corners.remove(current_corner)
+class CornerTourTable:
+    """
+    Exact corner-tour lengths for one layout, by maze distance: tours[i][rest]
+    is the length of the shortest walk that starts at corner i and visits
+    every corner in the bitmask rest, and rows[i] are the distances from
+    corner i to every free cell (indexed like MazeDistanceOracle.cells).
+    Unreachable corners count as infinitely far.
+    """
 
-    return heuristic
+    def __init__(self, walls, corners):
+        oracle = getDistanceOracle(walls)
+        self.index = oracle.index
+        inf = float('inf')
+        self.rows = [[inf if d == MazeDistanceOracle.UNREACHABLE else d for d in oracle.row(corner)]
+                     if corner in oracle.index else [inf] * len(oracle.cells) for corner in corners]
+        between = [[self.rows[i][oracle.index[corner]] if corner in oracle.index else inf for corner in corners]
+                   for i in range(len(corners))]
 
+        n = len(corners)
+        self.tours = [[0] * (1 << n) for _ in range(n)]
+        for rest in range(1, 1 << n): # EVERY PROPER SUBSET OF rest IS A SMALLER NUMBER, SO IT IS ALREADY FILLED IN
+            for i in range(n):
+                self.tours[i][rest] = min(between[i][j] + self.tours[j][rest & ~(1 << j)]
+                                          for j in range(n) if rest >> j & 1)
 
+_cornerTours = LayoutCache(CornerTourTable)
 
 class AStarCornersAgent(SearchAgent):
     "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
@@ -456,6 +560,51 @@ class FoodSearchProblem:
             cost += 1
         return cost
 
+class BitmaskFoodSearchProblem(FoodSearchProblem):
+    """
+    The FoodSearchProblem with the remaining food kept as an integer bitmask
+    instead of a Grid.
+
+    A search state is a tuple ( pacmanPosition, foodMask ) where bit i of
+    foodMask is set while problem.foodCells[i] still holds food.  Hashing,
+    comparing, goal testing and eating a dot are integer operations, so no
+    Grid is copied per successor.  foodGrid(mask) and foodList(mask) convert a
+    mask back for heuristics and displays that expect the Grid form.
+    """
+    def __init__(self, startingGameState: pacman.GameState):
+        FoodSearchProblem.__init__(self, startingGameState)
+        position, food = self.start
+        self.foodCells = food.asList()
+        self.foodBits = {cell: 1 << i for i, cell in enumerate(self.foodCells)}
+        self.start = (position, (1 << len(self.foodCells)) - 1) # EVERY DOT STILL THERE
+
+    def isGoalState(self, state):
+        return state[1] == 0
+
+    def getSuccessors(self, state):
+        "Returns successor states, the actions they require, and a cost of 1."
+        successors = []
+        self._expanded += 1 # DO NOT CHANGE
+        (x, y), mask = state
+        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+            dx, dy = Actions.directionToVector(direction)
+            nextx, nexty = int(x + dx), int(y + dy)
+            if not self.walls[nextx][nexty]:
+                nextMask = mask & ~self.foodBits.get((nextx, nexty), 0) # CLEAR THE BIT OF A DOT THAT GETS EATEN
+                successors.append( ( ((nextx, nexty), nextMask), direction, 1) )
+        return successors
+
+    def foodList(self, mask: int) -> List[Tuple[int, int]]:
+        "Returns the positions of the dots that are still set in mask."
+        return [cell for i, cell in enumerate(self.foodCells) if mask >> i & 1]
+
+    def foodGrid(self, mask: int) -> Grid:
+        "Returns the food that is still set in mask as a Grid (see game.py)."
+        grid = Grid(self.walls.width, self.walls.height)
+        for x, y in self.foodList(mask):
+            grid[x][y] = True
+        return grid
+
 class AStarFoodSearchAgent(SearchAgent):
     "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
     def __init__(self):
@@ -472,7 +621,8 @@ def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
 
     The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a Grid
     (see game.py) of either True or False. You can call foodGrid.asList() to get
-    a list of food coordinates instead.
+    a list of food coordinates instead.  For a BitmaskFoodSearchProblem the
+    second element is an integer mask instead (see problem.foodList).
 
     If you want access to info like walls, capsules, etc., you can query the
     problem.  For example, problem.walls gives you a Grid of where the walls
@@ -486,7 +636,10 @@ def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
     problem.heuristicInfo['wallCount']
     """
     position, foodGrid = state
-    foodList = foodGrid.asList()
+    if isinstance(foodGrid, int): # A BitmaskFoodSearchProblem STATE, THE FOOD IS A MASK
+        foodList = problem.foodList(foodGrid)
+    else:
+        foodList = foodGrid.asList()
 
     if not foodList:
         return 0
@@ -509,20 +662,129 @@ def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
     return heuristic
 
 
+def foodMazeHeuristic(state: Tuple[Tuple, Any], problem: FoodSearchProblem):
+    """
+    A stronger heuristic for the FoodSearchProblem (and BitmaskFoodSearchProblem)
+    that uses true maze distances instead of Manhattan distances.
+
+    Any path that eats all the remaining dots first walks to one of them and
+    then connects all of them, so it is at least as long as the maze distance
+    to the nearest dot plus the weight of a minimum spanning tree over the
+    dots.  The tree weight only depends on which dots are left, so it is
+    memoized per food subset in problem.heuristicInfo; the distances come from
+    the layout's MazeDistanceOracle.
+    """
+    position, food = state
+    if isinstance(food, int): # A BitmaskFoodSearchProblem STATE
+        foodList = problem.foodList(food)
+        key = food
+    else:
+        foodList = food.asList()
+        key = tuple(foodList)
+
+    if not foodList:
+        return 0
+
+    oracle = getDistanceOracle(problem.walls)
+    spanningTrees = problem.heuristicInfo.setdefault('mazeSpanningTrees', {}) # FOOD SUBSET -> MST WEIGHT
+    treeWeight = spanningTrees.get(key)
+    if treeWeight is None:
+        treeWeight = spanningTrees[key] = mazeSpanningTreeWeight(foodList, oracle)
+
+    row, index = oracle.row(position), oracle.index
+    nearest = min(row[index[food]] for food in foodList) # MAZE DISTANCE TO THE NEAREST DOT
+
+    return nearest + treeWeight
+
+def mazeSpanningTreeWeight(cells: List[Tuple[int, int]], oracle) -> int:
+    """
+    Returns the weight of a minimum spanning tree over cells where the edge
+    weights are maze distances from oracle, a MazeDistanceOracle (Prim's
+    algorithm, O(len(cells)^2)).
+    """
+    indices = [oracle.index[cell] for cell in cells]
+    row = oracle.row(cells[0])
+    best = [row[i] for i in indices] # DISTANCE FROM EACH CELL TO THE TREE SO FAR
+    inTree = [False] * len(cells)
+    inTree[0] = True
+    weight = 0
+    for _ in range(len(cells) - 1):
+        nextCell = min((k for k in range(len(cells)) if not inTree[k]), key=lambda k: best[k])
+        weight += best[nextCell]
+        inTree[nextCell] = True
+        row = oracle.row(cells[nextCell])
+        for k, i in enumerate(indices):
+            if not inTree[k] and row[i] < best[k]:
+                best[k] = row[i]
+    return weight
+
+def getPDBCacheDir():
+    "Returns the directory that pattern databases are saved to, from PACMAN_PDB_DIR (None keeps them in memory)."
+    return os.environ.get('PACMAN_PDB_DIR') or None
+
+def cornersPDBHeuristic(state: Any, problem: CornersProblem):
+    """
+    A pattern-database heuristic for the CornersProblem.  The abstraction
+    (position, corners still to visit) is the CornersProblem itself, so the
+    database holds the exact remaining cost of every state; it is built once
+    per layout (see patternDatabase.getPatternDatabase and PACMAN_PDB_DIR).
+    """
+    x, y, visited_corners = state
+    info = problem.heuristicInfo.get('cornersPDB')
+    if info is None:
+        abstraction = patternDatabase.PositionMaskAbstraction(problem.walls, problem.corners)
+        info = problem.heuristicInfo['cornersPDB'] = (abstraction, patternDatabase.getPatternDatabase(abstraction, getPDBCacheDir()))
+    abstraction, database = info
+    cost = database[abstraction.index((x, y), problem.allCorners & ~visited_corners)]
+    return float('inf') if cost == database.UNREACHABLE else cost
+
+def foodPDBHeuristic(state: Tuple[Tuple, Any], problem: FoodSearchProblem, patternSize=10):
+    """
+    A pattern-database heuristic for small FoodSearchProblems (and
+    BitmaskFoodSearchProblems).
+
+    The starting dots are split into patterns of at most patternSize dots (in
+    position order); for each pattern a database holds the exact cost of
+    eating just that pattern's remaining dots.  Each one ignores the other
+    dots, so each is a lower bound and the heuristic is their maximum.  With
+    patternSize or fewer dots the single database is exact.
+    """
+    position, food = state
+    patterns = problem.heuristicInfo.get('foodPDBs')
+    if patterns is None:
+        patterns = problem.heuristicInfo['foodPDBs'] = []
+        startFood = problem.getStartState()[1]
+        dots = sorted(problem.foodList(startFood) if isinstance(startFood, int) else startFood.asList())
+        for first in range(0, len(dots), patternSize):
+            targets = dots[first:first + patternSize]
+            abstraction = patternDatabase.PositionMaskAbstraction(problem.walls, targets)
+            database = patternDatabase.getPatternDatabase(abstraction, getPDBCacheDir())
+            problemBits = [problem.foodBits[dot] for dot in targets] if isinstance(startFood, int) else None
+            patterns.append((abstraction, database, targets, problemBits))
+
+    heuristic = 0
+    for abstraction, database, targets, problemBits in patterns:
+        mask = 0
+        if isinstance(food, int): # A BitmaskFoodSearchProblem STATE
+            for i, bit in enumerate(problemBits):
+                if food & bit:
+                    mask |= 1 << i
+        else:
+            for i, (x, y) in enumerate(targets):
+                if food[x][y]:
+                    mask |= 1 << i
+        cost = database[abstraction.index(position, mask)]
+        if cost == database.UNREACHABLE:
+            return float('inf')
+        heuristic = max(heuristic, cost)
+    return heuristic
+
 class ClosestDotSearchAgent(SearchAgent):
     "Search for all food using a sequence of searches"
     def registerInitialState(self, state):
-        self.actions = []
-        currentState = state
-        while(currentState.getFood().count() > 0):
-            nextPathSegment = self.findPathToClosestDot(currentState) # The missing piece
-            self.actions += nextPathSegment
-            for action in nextPathSegment:
-                legal = currentState.getLegalActions()
-                if action not in legal:
-                    t = (str(action), str(currentState))
-                    raise Exception('findPathToClosestDot returned an illegal move: %s!\n%s' % t)
-                currentState = currentState.generateSuccessor(0, action)
+        # PLAN THE WHOLE TOUR AT ONCE ON POSITIONS, INSTEAD OF ONE SEARCH AND ONE
+        # GameState REPLAY PER DOT (findPathToClosestDot STILL DOES A SINGLE LEG)
+        self.actions = closestDotTour(state.getWalls(), state.getPacmanPosition(), state.getFood())
         self.actionIndex = 0
         print('Path found with cost %d.' % len(self.actions))
 
@@ -541,6 +803,39 @@ class ClosestDotSearchAgent(SearchAgent):
         from search import aStarSearch
         return aStarSearch(problem)
 
+def closestDotTour(walls, start: Tuple[int, int], food) -> List[Directions]:
+    """
+    Returns the actions of the greedy tour that always walks to the closest
+    remaining dot (by maze distance) until no reachable dot is left.
+
+    Only positions are tracked: the distances come from the layout's
+    MazeDistanceOracle, whose row for a cell is computed once and reused every
+    time Pacman stands on that cell or walks towards it.  Dots that lie on the
+    way to the closest one are eaten as well.
+    """
+    oracle = getDistanceOracle(walls)
+    moves = getLegalMoves(walls)
+    index = oracle.index
+    remaining = set(food.asList())
+    actions = []
+    position = start
+    remaining.discard(position)
+    while remaining:
+        row = oracle.row(position)
+        target = min(remaining, key=lambda cell: (row[index[cell]], cell)) # THE CLOSEST DOT (TIES BY POSITION)
+        if row[index[target]] == MazeDistanceOracle.UNREACHABLE: # THE DOTS LEFT CANNOT BE REACHED
+            break
+        targetRow = oracle.row(target) # DISTANCES TO THE TARGET, WALK DOWNHILL ON THEM
+        while position != target:
+            distance = targetRow[index[position]]
+            for nextPosition, action in moves[position]:
+                if targetRow[index[nextPosition]] == distance - 1:
+                    break
+            actions.append(action)
+            position = nextPosition
+            remaining.discard(position) # EATS THE TARGET AND ANY DOT ON THE WAY
+    return actions
+
 class AnyFoodSearchProblem(PositionSearchProblem):
     """
     A search problem for finding a path to any food.
@@ -566,6 +861,37 @@ class AnyFoodSearchProblem(PositionSearchProblem):
         self.startState = gameState.getPacmanPosition()
         self.costFn = lambda x: 1
         self._visited, self._visitedlist, self._expanded = {}, [], 0 # DO NOT CHANGE
+        self.moves = getLegalMoves(self.walls)
+        self.successorCache = {}
+        self.distanceField = None # BUILT ON THE FIRST getDistanceField CALL
+        self.ownsFood = False # self.food IS THE GAME STATE'S GRID UNTIL A DOT IS REMOVED
+
+    def getDistanceField(self):
+        """
+        Returns the FoodDistanceField of this problem's food (built once), with
+        the distance from every cell to the nearest dot and a shortest path
+        to it.  Remove dots through removeFood, which updates the field and
+        the goal test together.
+        """
+        if self.distanceField is None:
+            self.distanceField = FoodDistanceField(self.walls, self.food)
+        return self.distanceField
+
+    def removeFood(self, cell: Tuple[int, int]):
+        """
+        Removes the dot at cell (if there is one) from this problem's food, so
+        it is no longer a goal, and from its distance field if that is built.
+        The game state's food grid is not changed.
+        """
+        x, y = cell
+        if not self.food[x][y]:
+            return
+        if not self.ownsFood:
+            self.food = self.food.copy()
+            self.ownsFood = True
+        self.food[x][y] = False
+        if self.distanceField is not None:
+            self.distanceField.removeFood(cell)
 
     def isGoalState(self, state: Tuple[int, int]):
         """
@@ -578,7 +904,255 @@ class AnyFoodSearchProblem(PositionSearchProblem):
         "*** YOUR CODE HERE ***"
         util.raiseNotDefined()
 
-def mazeDistance(point1: Tuple[int, int], point2: Tuple[int, int], gameState: pacman.GameState) -> int:
+class MazeDistanceOracle:
+    """
+    Exact maze distances between the free cells of one wall layout.
+
+    The free cells are numbered once.  The distances from a source cell are
+    computed by a single BFS the first time that source is queried and are
+    kept as a compact array('H') row indexed by cell number, so each source
+    costs one BFS per layout instead of one per query.
+
+    The file format of save is a HEADER_SIZE byte header (magic, byte order,
+    width, height, number of free cells and the SHA-1 of the walls'
+    fingerprint) followed by the raw rows, in cell order.
+    """
+
+    UNREACHABLE = 0xFFFF
+    MAGIC = b'MZD1'
+    HEADER = struct.Struct('<4scxxxIIQ20s')
+    HEADER_SIZE = 64 # PADDED SO THAT THE ROWS START ALIGNED
+
+    def __init__(self, walls):
+        self.width = walls.width
+        self.height = walls.height
+        self.fingerprint = walls.packBits()
+        self.digest = hashlib.sha1(repr(self.fingerprint).encode()).digest()
+        self.cacheDirs = set() # DIRECTORIES ALREADY LOADED FROM OR SAVED TO
+        self.cells = [(x, y) for x in range(walls.width) for y in range(walls.height) if not walls[x][y]]
+        self.index = {cell: i for i, cell in enumerate(self.cells)}
+        self.neighbours = [[self.index[(x + dx, y + dy)] for dx, dy in ((0, 1), (0, -1), (1, 0), (-1, 0)) if not walls[x + dx][y + dy]]
+                           for x, y in self.cells]
+        self.rows = [None] * len(self.cells) # ONE DISTANCE ROW PER SOURCE, FILLED LAZILY
+
+    def distance(self, point1: Tuple[int, int], point2: Tuple[int, int]):
+        """
+        Returns the maze distance between two free cells, or None if point2
+        cannot be reached from point1.
+        """
+        d = self.row(point1)[self.index[point2]]
+        return None if d == self.UNREACHABLE else d
+
+    def row(self, source: Tuple[int, int]):
+        """
+        Returns the distances from source to every free cell, indexed like
+        self.cells.
+        """
+        i = self.index[source]
+        row = self.rows[i]
+        if row is None:
+            row = self.rows[i] = self._bfs(i)
+        return row
+
+    def _bfs(self, source):
+        row = array('H', [self.UNREACHABLE]) * len(self.cells)
+        row[source] = 0
+        neighbours = self.neighbours
+        queue = deque([source])
+        while queue:
+            i = queue.popleft()
+            d = row[i] + 1
+            for j in neighbours[i]:
+                if row[j] == self.UNREACHABLE:
+                    row[j] = d
+                    queue.append(j)
+        return row
+
+    def fill(self):
+        "Computes the rows of all sources that have not been queried yet."
+        for cell in self.cells:
+            self.row(cell)
+
+    def save(self, path):
+        "Writes the whole table to path (filling in the missing rows first)."
+        self.fill()
+        header = self.HEADER.pack(self.MAGIC, sys.byteorder[0].encode(), self.width, self.height,
+                                  len(self.cells), self.digest)
+        with open(path, 'wb') as f:
+            f.write(header.ljust(self.HEADER_SIZE, b'\0'))
+            for row in self.rows:
+                row.tofile(f)
+
+    def load(self, path):
+        """
+        Reads a table written by save.  Returns False (and keeps the table
+        unchanged) if the file belongs to a different wall layout, was written
+        on a machine of another byte order or is truncated.
+        """
+        with open(path, 'rb') as f:
+            header = f.read(self.HEADER_SIZE)
+            if len(header) < self.HEADER_SIZE:
+                return False
+            magic, byteorder, width, height, size, digest = self.HEADER.unpack_from(header)
+            if (magic != self.MAGIC or byteorder != sys.byteorder[0].encode() or (width, height) != (self.width, self.height)
+                    or size != len(self.cells) or digest != self.digest):
+                return False
+            rows = []
+            for _ in range(size):
+                row = array('H')
+                try:
+                    row.fromfile(f, size)
+                except EOFError:
+                    return False
+                rows.append(row)
+        self.rows = rows
+        return True
+
+    def useCacheDir(self, cacheDir):
+        """
+        Reads the table from its file in cacheDir or, if there is no usable
+        file there yet, writes it there.  Each directory is only looked at once.
+        """
+        if cacheDir in self.cacheDirs:
+            return
+        self.cacheDirs.add(cacheDir)
+        path = os.path.join(cacheDir, 'mazeDistances-%s.bin' % self.digest.hex()[:16])
+        if not os.path.exists(path) or not self.load(path):
+            self.save(path)
+
+class FoodDistanceField:
+    """
+    The maze distance from every free cell to its nearest dot, computed by one
+    multi-source BFS from all the dots at once.
+
+    Every reached cell also remembers which dot it is nearest to (ties go to
+    the dot the BFS reached it from first).  Removing a dot only recomputes
+    the cells that were nearest to it, starting from the cells around them,
+    and the path from any cell to its nearest dot is found by walking
+    downhill on the field, in O(path length).
+    """
+
+    UNREACHABLE = MazeDistanceOracle.UNREACHABLE
+
+    def __init__(self, walls, food):
+        oracle = getDistanceOracle(walls) # ONLY FOR ITS CELL NUMBERING AND NEIGHBOUR LISTS
+        self.index = oracle.index
+        self.cells = oracle.cells
+        self.neighbours = oracle.neighbours
+        self.moves = getLegalMoves(walls)
+        self.food = set(self.index[cell] for cell in food.asList())
+        self.dist = array('H', [self.UNREACHABLE]) * len(self.cells)
+        self.source = array('l', [-1]) * len(self.cells) # CELL NUMBER OF THE NEAREST DOT, -1 IF NONE
+        dist, source = self.dist, self.source
+        queue = deque()
+        for i in sorted(self.food):
+            dist[i] = 0
+            source[i] = i
+            queue.append(i)
+        neighbours = self.neighbours
+        while queue:
+            i = queue.popleft()
+            d = dist[i] + 1
+            for j in neighbours[i]:
+                if dist[j] == self.UNREACHABLE:
+                    dist[j] = d
+                    source[j] = source[i]
+                    queue.append(j)
+
+    def distance(self, cell: Tuple[int, int]):
+        "Returns the maze distance from cell to the nearest dot, or None if no dot can be reached."
+        d = self.dist[self.index[cell]]
+        return None if d == self.UNREACHABLE else d
+
+    def nearestFood(self, cell: Tuple[int, int]):
+        "Returns the dot nearest to cell, or None if no dot can be reached."
+        i = self.source[self.index[cell]]
+        return None if i < 0 else self.cells[i]
+
+    def removeFood(self, cell: Tuple[int, int]):
+        """
+        Removes the dot at cell (if there is one) and repairs the field.
+        Only the cells whose nearest dot it was can get farther from food;
+        they are cleared and filled in again from the cells bordering them.
+        No food grid is changed: for a problem's field, call
+        AnyFoodSearchProblem.removeFood instead, which updates both.
+        """
+        removed = self.index[cell]
+        if removed not in self.food:
+            return
+        self.food.discard(removed)
+        dist, source, neighbours = self.dist, self.source, self.neighbours
+
+        region = [removed] # EVERY CELL WHOSE NEAREST DOT WAS THE REMOVED ONE; ITS BFS TREE KEEPS THEM CONNECTED
+        source[removed] = -1
+        for i in region:
+            dist[i] = self.UNREACHABLE
+            for j in neighbours[i]:
+                if source[j] == removed:
+                    source[j] = -1
+                    region.append(j)
+
+        frontier = [] # THE CELLS AROUND THE REGION, WHOSE DISTANCES DID NOT CHANGE
+        for i in region:
+            for j in neighbours[i]:
+                if source[j] >= 0:
+                    frontier.append((dist[j], j))
+        heapq.heapify(frontier)
+        while frontier:
+            d, i = heapq.heappop(frontier)
+            if d > dist[i]: # ALREADY REACHED MORE CHEAPLY
+                continue
+            for j in neighbours[i]:
+                if d + 1 < dist[j]:
+                    dist[j] = d + 1
+                    source[j] = source[i]
+                    heapq.heappush(frontier, (d + 1, j))
+
+    def pathToNearestFood(self, cell: Tuple[int, int]) -> List[Directions]:
+        """
+        Returns the actions of a shortest path from cell to a nearest dot
+        ([] if cell holds a dot or no dot can be reached).
+        """
+        dist, index = self.dist, self.index
+        distance = dist[index[cell]]
+        if distance == self.UNREACHABLE:
+            return []
+        actions = []
+        while distance > 0: # EVERY FREE CELL AT DISTANCE d > 0 HAS A NEIGHBOUR AT d - 1
+            for nextCell, action in self.moves[cell]:
+                if dist[index[nextCell]] == distance - 1:
+                    break
+            actions.append(action)
+            cell = nextCell
+            distance -= 1
+        return actions
+
+def buildDistanceOracle(walls, cacheDir=None) -> MazeDistanceOracle:
+    """
+    Returns a new MazeDistanceOracle for walls.  If cacheDir is given, the
+    complete table is read from (or, the first time, written to) a file in
+    that directory, so it can be reused across runs.
+    """
+    oracle = MazeDistanceOracle(walls)
+    if cacheDir is not None:
+        oracle.useCacheDir(cacheDir)
+    return oracle
+
+_distanceOracles = LayoutCache(buildDistanceOracle)
+
+def getDistanceOracle(walls, cacheDir=None) -> MazeDistanceOracle:
+    """
+    Returns the shared MazeDistanceOracle for a wall grid, so all game states
+    and problems of a layout use the same table (see buildDistanceOracle for
+    cacheDir; an oracle that is already shared is still saved to a cacheDir
+    that has no file for it yet).
+    """
+    oracle = _distanceOracles.get(walls)
+    if cacheDir is not None:
+        oracle.useCacheDir(cacheDir)
+    return oracle
+
+def mazeDistance(point1: Tuple[int, int], point2: Tuple[int, int], gameState: pacman.GameState, cacheDir=None) -> int:
     """
     Returns the maze distance between any two points, using the search functions
     you have already built. The gameState can be any game state -- Pacman's
@@ -587,11 +1161,16 @@ def mazeDistance(point1: Tuple[int, int], point2: Tuple[int, int], gameState: pa
     Example usage: mazeDistance( (2,4), (5,6), gameState)
 
     This might be a useful helper function for your ApproximateSearchAgent.
+
+    The distances come from the layout's shared MazeDistanceOracle, so only the
+    first query from each point runs a BFS (see buildDistanceOracle for cacheDir).
     """
     x1, y1 = point1
     x2, y2 = point2
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    distance = getDistanceOracle(walls, cacheDir).distance(point1, point2)
+    if distance is None: # NO PATH; A BFS WOULD HAVE RETURNED AN EMPTY LIST OF ACTIONS
+        return 0
+    return distance
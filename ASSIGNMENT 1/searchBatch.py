@@ -0,0 +1,107 @@
+# searchBatch.py
+# --------------
+# Solves many independent search problems on one layout in a pool of worker
+# processes.
+
+
+"""
+Batch API for solving many position and corner problems offline.
+
+A problem spec is a dict:
+
+  problem    'PositionSearchProblem' (default) or 'CornersProblem'
+  start      (x, y) where Pacman starts [Default: the layout's start]
+  goal       (x, y) for PositionSearchProblem [Default: (1, 1)]
+  search     a search function of search.py, e.g. 'bfs' or 'astar' [Default: 'astar']
+  heuristic  a heuristic of searchAgents.py or search.py [Default: none]
+
+> results = solveBatch('mediumMaze', [{'start': (34, 16), 'goal': (1, 1)}, ...])
+
+The layout is sent to every worker once, when the pool starts, and each
+worker builds its GameState (and with it the per-layout move tables and
+distance oracles) once; after that only the specs and the results travel
+between processes, chunksize specs at a time.  Results come back in the
+order of the specs.
+"""
+
+import multiprocessing
+import time
+import layout
+import pacman
+import search
+import searchAgents
+from searchBenchmark import getSearchFunction
+
+_worker = {} # THE GameState OF THE LAYOUT THIS PROCESS WORKS ON, SET BY _initWorker
+
+def _initWorker(lay, withStats):
+    gameState = pacman.GameState()
+    gameState.initialize(lay, 0)
+    _worker['gameState'] = gameState
+    _worker['withStats'] = withStats
+    _worker['searchFunctions'] = {} # (SEARCH, HEURISTIC) -> FUNCTION OF A PROBLEM
+
+def makeProblem(gameState, spec):
+    """
+    Builds the search problem a spec asks for on gameState.
+    """
+    problemType = spec.get('problem', 'PositionSearchProblem')
+    if problemType == 'PositionSearchProblem':
+        return searchAgents.PositionSearchProblem(gameState, goal=tuple(spec.get('goal', (1, 1))),
+                                                  start=spec.get('start') and tuple(spec['start']),
+                                                  warn=False, visualize=False)
+    if problemType == 'CornersProblem':
+        problem = searchAgents.CornersProblem(gameState)
+        if spec.get('start') is not None:
+            problem.startingPosition = tuple(spec['start'])
+        return problem
+    raise AttributeError(problemType + ' is not a problem type the batch solver supports.')
+
+def _solve(spec):
+    # RUNS IN A WORKER: SOLVES ONE SPEC ON THE WORKER'S GameState
+    key = (spec.get('search', 'astar'), spec.get('heuristic'))
+    searchFunction = _worker['searchFunctions'].get(key)
+    if searchFunction is None:
+        searchFunction = _worker['searchFunctions'][key] = getSearchFunction(*key)
+
+    problem = makeProblem(_worker['gameState'], spec)
+    searched = search.InstrumentedProblem(problem) if _worker['withStats'] else problem
+    start = time.perf_counter()
+    actions = searchFunction(searched) or []
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'actions': actions,
+        'cost': problem.getCostOfActions(actions),
+        'expanded': problem._expanded,
+        'time': elapsed,
+    }
+    if _worker['withStats']:
+        result['stats'] = searched.searchStats.asDict()
+    return result
+
+def solveBatch(lay, specs, processes=None, chunksize=16, withStats=False):
+    """
+    Solves every spec on the layout lay (a layout.Layout or the name of one)
+    and returns one result dict per spec, in order:
+
+      actions   the path found ([] if there is none)
+      cost      its cost under the problem's getCostOfActions
+      expanded  problem._expanded
+      time      seconds spent in the search function
+      stats     SearchStats.asDict() of an InstrumentedProblem (withStats only)
+
+    processes is the number of worker processes (default: one per core);
+    with processes=1 everything runs in this process, without a pool.
+    """
+    if isinstance(lay, str):
+        name = lay
+        lay = layout.getLayout(name)
+        if lay is None:
+            raise Exception("The layout " + name + " cannot be found")
+    if processes == 1:
+        _initWorker(lay, withStats)
+        return [_solve(spec) for spec in specs]
+
+    with multiprocessing.Pool(processes, initializer=_initWorker, initargs=(lay, withStats)) as pool:
+        return list(pool.imap(_solve, specs, chunksize))
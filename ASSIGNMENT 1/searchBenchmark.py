@@ -0,0 +1,257 @@
+# searchBenchmark.py
+# ------------------
+# Headless benchmarks for the search functions in search.py on the search
+# problems and heuristics in searchAgents.py.
+
+
+"""
+Runs every (search function, problem type, heuristic, layout) combination of a
+suite without graphics and reports the path cost, node counts, time and peak
+memory of each one as CSV or JSON, so that two versions of the code can be
+compared run for run.
+
+> python searchBenchmark.py
+> python searchBenchmark.py -s corners -r 5 -o corners.csv
+> python searchBenchmark.py -o new.json --compare old.json
+
+Each combination is solved repeats times for timing, once more on an
+InstrumentedProblem for the node counts (generated, reopened, peak frontier)
+and, unless --no-memory is given, once more under tracemalloc for the peak
+memory.  The timed runs are not instrumented or traced.
+"""
+
+import csv
+import inspect
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from optparse import OptionParser
+import layout
+import pacman
+import patternDatabase
+import search
+import searchAgents
+
+# SUITE -> (PROBLEM TYPE, LAYOUTS, [(SEARCH FUNCTION, HEURISTIC), ...]); ONLY COMBINATIONS THAT FINISH IN SECONDS
+SUITES = {
+    'position': ('PositionSearchProblem', ['tinyMaze', 'mediumMaze', 'bigMaze', 'openMaze'],
+                 [('dfs', None), ('bfs', None), ('ucs', None), ('bibfs', None), ('jps', None),
+                  ('astar', 'nullHeuristic'), ('astar', 'manhattanHeuristic'), ('astar', 'euclideanHeuristic'),
+                  ('castar', 'manhattanHeuristic'), ('smastar', 'manhattanHeuristic')]),
+    'corners': ('CornersProblem', ['tinyCorners', 'mediumCorners', 'bigCorners'],
+                [('bfs', None), ('ucs', None), ('astar', 'cornersHeuristic'), ('astar', 'cornersPDBHeuristic')]),
+    'food': ('FoodSearchProblem', ['testSearch', 'tinySearch', 'trickySearch'],
+             [('astar', 'foodHeuristic'), ('astar', 'foodMazeHeuristic'), ('astar', 'foodPDBHeuristic')]),
+    'bitmaskFood': ('BitmaskFoodSearchProblem', ['testSearch', 'tinySearch', 'trickySearch'],
+                    [('astar', 'foodHeuristic'), ('astar', 'foodMazeHeuristic'), ('astar', 'foodPDBHeuristic')]),
+}
+
+FIELDS = ['suite', 'layout', 'problem', 'search', 'heuristic', 'repeats', 'pathLength', 'cost',
+          'expanded', 'generated', 'reopened', 'peakFrontier', 'heuristicCalls',
+          'timeMin', 'timeMedian', 'timeMean', 'peakMemoryKB']
+
+def getSearchFunction(fn, heuristic=None):
+    """
+    Returns a function of a problem that runs search.<fn>, with the named
+    heuristic (from searchAgents.py or search.py) if one is given.
+    """
+    func = getattr(search, fn, None)
+    if func is None:
+        raise AttributeError(fn + ' is not a search function in search.py.')
+    if heuristic is None:
+        return func
+    heur = getattr(searchAgents, heuristic, None) or getattr(search, heuristic, None)
+    if heur is None:
+        raise AttributeError(heuristic + ' is not a function in searchAgents.py or search.py.')
+    return lambda problem: func(problem, heuristic=search.instrumentHeuristic(heur, problem))
+
+def makeProblem(problemType, gameState):
+    problemClass = getattr(searchAgents, problemType)
+    parameters = inspect.signature(problemClass).parameters
+    # ONLY PositionSearchProblem ITSELF (NOT E.G. AnyFoodSearchProblem) TAKES THESE
+    options = {name: False for name in ('warn', 'visualize') if name in parameters}
+    return problemClass(gameState, **options)
+
+def loadGameState(layoutName):
+    lay = layout.getLayout(layoutName)
+    if lay is None:
+        raise Exception("The layout " + layoutName + " cannot be found")
+    gameState = pacman.GameState()
+    gameState.initialize(lay, 0)
+    return gameState
+
+def clearLayoutCaches():
+    # FORGETS THE LEGAL MOVE TABLES, DISTANCE ORACLES, CORNER TOURS AND PATTERN DATABASES SHARED BETWEEN
+    # PROBLEMS (DATABASE FILES UNDER PACMAN_PDB_DIR STAY, SO UNSET IT TO TIME BUILDING THEM TOO)
+    searchAgents._legalMoves.clear()
+    searchAgents._distanceOracles.clear()
+    searchAgents._cornerTours.clear()
+    patternDatabase._databases.clear()
+
+def benchmark(suite, problemType, layoutName, fn, heuristic, repeats=3, memory=True, cold=False):
+    """
+    Benchmarks one combination and returns its row of the report (a dict with
+    the keys in FIELDS).
+    """
+    gameState = loadGameState(layoutName)
+    searchFunction = getSearchFunction(fn, heuristic)
+
+    times = []
+    for _ in range(repeats):
+        if cold:
+            clearLayoutCaches()
+        problem = makeProblem(problemType, gameState)
+        start = time.perf_counter()
+        actions = searchFunction(problem) or []
+        times.append(time.perf_counter() - start)
+    expanded = problem._expanded
+
+    problem = makeProblem(problemType, gameState)
+    instrumented = search.InstrumentedProblem(problem)
+    searchFunction(instrumented)
+    stats = instrumented.searchStats
+
+    peakMemory = None
+    if memory:
+        if cold:
+            clearLayoutCaches()
+        problem = makeProblem(problemType, gameState)
+        tracemalloc.start()
+        searchFunction(problem)
+        peakMemory = tracemalloc.get_traced_memory()[1] / 1024.0
+        tracemalloc.stop()
+
+    return {
+        'suite': suite,
+        'layout': layoutName,
+        'problem': problemType,
+        'search': fn,
+        'heuristic': heuristic or '',
+        'repeats': repeats,
+        'pathLength': len(actions),
+        'cost': problem.getCostOfActions(actions),
+        'expanded': expanded,
+        'generated': stats.generated,
+        'reopened': stats.reopened,
+        'peakFrontier': stats.peakFrontier,
+        'heuristicCalls': stats.heuristicCalls,
+        'timeMin': min(times),
+        'timeMedian': statistics.median(times),
+        'timeMean': statistics.mean(times),
+        'peakMemoryKB': peakMemory,
+    }
+
+def runSuites(suites, layouts=None, searches=None, repeats=3, memory=True, cold=False):
+    """
+    Benchmarks every combination of the named suites, optionally only on the
+    given layouts and search functions, and returns the rows in order.
+    """
+    rows = []
+    for suite in suites:
+        problemType, suiteLayouts, combinations = SUITES[suite]
+        for layoutName in layouts or suiteLayouts:
+            for fn, heuristic in combinations:
+                if searches and fn not in searches:
+                    continue
+                row = benchmark(suite, problemType, layoutName, fn, heuristic, repeats, memory, cold)
+                print('%-12s %-14s %-8s %-20s cost %-6s expanded %-7d %.4fs' %
+                      (suite, layoutName, fn, heuristic or '', row['cost'], row['expanded'], row['timeMedian']),
+                      file=sys.stderr)
+                rows.append(row)
+    return rows
+
+def writeReport(rows, fileName=None):
+    """
+    Writes the rows as JSON if fileName ends in .json and as CSV otherwise
+    (to standard output if there is no fileName).
+    """
+    out = open(fileName, 'w', newline='') if fileName else sys.stdout
+    try:
+        if fileName and fileName.endswith('.json'):
+            json.dump(rows, out, indent=1)
+            out.write('\n')
+        else:
+            writer = csv.DictWriter(out, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    finally:
+        if fileName:
+            out.close()
+
+def readReport(fileName):
+    if fileName.endswith('.json'):
+        with open(fileName) as report:
+            return json.load(report)
+    with open(fileName, newline='') as report:
+        return list(csv.DictReader(report))
+
+def compareReports(old, new, slowdown=1.25):
+    """
+    Returns a line for every combination of new whose cost or expansions
+    differ from old, or whose median time grew by more than slowdown times.
+    """
+    key = lambda row: (row['layout'], row['problem'], row['search'], row['heuristic'])
+    previous = dict((key(row), row) for row in old)
+    changes = []
+    for row in new:
+        before = previous.get(key(row))
+        if before is None:
+            continue
+        name = ' '.join(part for part in key(row) if part)
+        for field in ('cost', 'expanded'):
+            if float(before[field]) != float(row[field]):
+                changes.append('%s: %s %s -> %s' % (name, field, before[field], row[field]))
+        if float(row['timeMedian']) > slowdown * float(before['timeMedian']):
+            changes.append('%s: median time %.4fs -> %.4fs' % (name, float(before['timeMedian']), float(row['timeMedian'])))
+    return changes
+
+def readCommand(argv):
+    usageStr = """
+    USAGE:      python searchBenchmark.py <options>
+    EXAMPLES:   (1) python searchBenchmark.py
+                    - benchmarks every suite, CSV to standard output
+                (2) python searchBenchmark.py -s position,corners -l mediumMaze,mediumCorners -o run.json
+                    - two suites on one layout each, JSON report
+    """
+    parser = OptionParser(usageStr)
+    parser.add_option('-s', '--suites', dest='suites', default=','.join(SUITES),
+                      help='comma separated suites out of %s [Default: all]' % ', '.join(SUITES))
+    parser.add_option('-l', '--layouts', dest='layouts', default=None,
+                      help='comma separated layouts, instead of the ones of each suite')
+    parser.add_option('-f', '--searches', dest='searches', default=None,
+                      help='comma separated search functions to keep (e.g. bfs,astar)')
+    parser.add_option('-r', '--repeats', dest='repeats', type='int', default=3,
+                      help='timed runs per combination [Default: %default]')
+    parser.add_option('-o', '--output', dest='output', default=None,
+                      help='report file, JSON if it ends in .json and CSV otherwise [Default: standard output]')
+    parser.add_option('--compare', dest='compare', default=None,
+                      help='an earlier report to compare costs, expansions and times against')
+    parser.add_option('--slowdown', dest='slowdown', type='float', default=1.25,
+                      help='median time ratio that --compare reports as slower [Default: %default]')
+    parser.add_option('--no-memory', action='store_false', dest='memory', default=True,
+                      help='skip the tracemalloc run')
+    parser.add_option('--cold', action='store_true', dest='cold', default=False,
+                      help='clear the per-layout caches and pattern databases in memory before every run')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    for suite in options.suites.split(','):
+        if suite not in SUITES:
+            raise Exception('Unknown suite: ' + suite)
+    return options
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    rows = runSuites(options.suites.split(','),
+                     options.layouts.split(',') if options.layouts else None,
+                     options.searches.split(',') if options.searches else None,
+                     max(1, options.repeats), options.memory, options.cold)
+    writeReport(rows, options.output)
+    if options.compare:
+        changes = compareReports(readReport(options.compare), rows, options.slowdown)
+        for change in changes:
+            print(change, file=sys.stderr)
+        if changes:
+            sys.exit(1)
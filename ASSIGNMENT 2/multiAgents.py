@@ -12,12 +12,12 @@
 # Pieter Abbeel (pabbeel@cs.berkeley.edu).
 
 
-from util import manhattanDistance
-from game import Directions
-import random, util
+from util import manhattanDistance, nearestPoint
+from game import Directions, Actions, Configuration, AgentState, Grid
+import random, util, time, collections
 
 from game import Agent
-from pacman import GameState
+from pacman import GameState, SCARED_TIME, TIME_PENALTY, COLLISION_TOLERANCE
 
 class ReflexAgent(Agent):
     """
@@ -108,6 +108,438 @@ def scoreEvaluationFunction(currentGameState: GameState):
     """
     return currentGameState.getScore()
 
+EXACT, LOWER, UPPER = 0, 1, 2 # TRANSPOSITION TABLE BOUND TYPES: THE STORED VALUE IS EXACT, A LOWER BOUND OR AN UPPER BOUND
+
+class TranspositionTable:
+    """
+    A fixed-size table of search results, shared by all the turns of a game.
+
+    A position is identified by a Zobrist key: one random 64-bit number per
+    feature (Pacman's position, each ghost's position, direction and scared
+    timer, each dot, each capsule and the agent to move), XORed together.  The
+    numbers are drawn the first time a feature is seen.  Each slot keeps the
+    full key, the remaining depth searched, the value, its bound type (EXACT,
+    LOWER or UPPER) and the best move found.
+
+    The score is not part of the key: values are stored relative to the score
+    of their state and given back relative to the score of the state asking,
+    so the same position reached with another score (on a later turn, or
+    after eating a ghost on another path) finds them too.  That is exact for
+    evaluation functions that are the score plus terms that do not depend on
+    it, as both evaluation functions here are.  A probe accepts an entry
+    searched at least as deep as it asks for.
+
+    A new entry replaces the one in its slot unless that one was stored in
+    the current search (generation) with a greater remaining depth.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.slots = [None] * size # (KEY, DEPTH, VALUE, BOUND, MOVE, GENERATION)
+        self.features = {} # FEATURE -> ITS RANDOM 64-BIT NUMBER
+        self.random = random.Random(0) # ITS OWN GENERATOR, SO THE GAME'S RANDOMNESS IS UNTOUCHED
+        self.foodKeys = FoodMemo(self.foodKey)
+        self.generation = 0
+        self.hits = 0
+        self.reusedHits = 0 # HITS ON ENTRIES STORED BY AN EARLIER SEARCH
+        self.stores = 0
+
+    def newSearch(self):
+        "Starts a new search (a new getAction): older entries become replaceable."
+        self.generation += 1
+        self.foodKeys.clear()
+
+    def feature(self, *feature):
+        number = self.features.get(feature)
+        if number is None:
+            number = self.features[feature] = self.random.getrandbits(64)
+        return number
+
+    def foodKey(self, food):
+        "Returns the XOR of the numbers of the dots of a food grid."
+        foodKey = 0
+        for dot in food.asList():
+            foodKey ^= self.feature('food', dot)
+        return foodKey
+
+    def key(self, state, agentIndex):
+        "Returns the Zobrist key of state with agentIndex to move."
+        feature = self.feature
+        key = feature('pacman', state.getPacmanPosition()) ^ feature('agent', agentIndex)
+        for index, ghostState in enumerate(state.getGhostStates()):
+            key ^= feature('ghost', index, ghostState.getPosition(), ghostState.getDirection(), ghostState.scaredTimer)
+        for capsule in state.getCapsules():
+            key ^= feature('capsule', capsule)
+        return key ^ self.foodKeys.get(state.getFood())
+
+    def probe(self, key, depth, score=0):
+        """
+        Returns (value, bound, move) stored for key with at least depth plies
+        searched, the value relative to score, or None.
+        """
+        entry = self.slots[key % self.size]
+        if entry is None or entry[0] != key or entry[1] < depth:
+            return None
+        self.hits += 1
+        if entry[5] != self.generation:
+            self.reusedHits += 1
+        return entry[2] + score, entry[3], entry[4]
+
+    def store(self, key, depth, value, bound, move=None, score=0):
+        "Stores a value found for key with depth plies searched, for a state whose score is score."
+        index = key % self.size
+        entry = self.slots[index]
+        if entry is not None and entry[5] == self.generation and entry[1] > depth: # KEEP A DEEPER RESULT OF THIS SEARCH
+            return
+        self.slots[index] = (key, depth, value - score, bound, move, self.generation)
+        self.stores += 1
+
+    def cutoff(self, key, depth, alpha, beta, score=0):
+        """
+        Returns (value, move) for a node searched with the window (alpha,
+        beta).  value is a stored value that settles the node, or None: an
+        exact value, or a bound that would have been pruned anyway (a lower
+        bound above beta, an upper bound below alpha).  move is the best move
+        stored for key, however deep it was searched, or None.
+        """
+        entry = self.slots[key % self.size]
+        if entry is None or entry[0] != key:
+            return None, None
+        move = entry[4]
+        entry = self.probe(key, depth, score)
+        if entry is None:
+            return None, move
+        value, bound, _ = entry
+        if bound == EXACT or (bound == LOWER and value > beta) or (bound == UPPER and value < alpha):
+            return value, move
+        return None, move
+
+def boundType(value, alpha, beta):
+    "Returns the bound type of a value an alpha-beta search returned for the window (alpha, beta)."
+    if value <= alpha:
+        return UPPER
+    if value >= beta:
+        return LOWER
+    return EXACT
+
+def foodBits(food):
+    "Returns the dots of a food grid as an int: bit x * height + y is set while there is a dot at (x, y)."
+    bits = 0
+    for x, y in food.asList():
+        bits |= 1 << (x * food.height + y)
+    return bits
+
+class FoodMemo:
+    """
+    Remembers compute(food) per food grid.  Successor states share their
+    parent's food grid until a dot is eaten, so within a search the same few
+    grids are asked about over and over.
+
+    Grids are found by the id of their data list.  The memo keeps every list
+    it has seen alive, so no other list can get the same id while it is in
+    the memo; clear() lets them go.
+    """
+
+    def __init__(self, compute):
+        self.compute = compute
+        self.values = {} # id(FOOD GRID DATA) -> (DATA, VALUE)
+
+    def get(self, food):
+        entry = self.values.get(id(food.data))
+        if entry is None or entry[0] is not food.data:
+            entry = self.values[id(food.data)] = (food.data, self.compute(food))
+        return entry[1]
+
+    def clear(self):
+        self.values.clear()
+
+class SuccessorCache:
+    """
+    A bounded cache of generateSuccessor results, shared by all the turns of a
+    game: the same (state, agent, action) expansions come up again within one
+    search (different move orders reaching the same state) and in the
+    searches of the next turns, whose trees mostly lie inside the last one.
+
+    States are told apart by their agents' positions, directions and scared
+    timers, their dots, capsules and score, so equal GameStates reached by
+    different paths share their successors.  Once more than size successors
+    are kept the least recently used one is dropped.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.successors = collections.OrderedDict() # (STATE KEY, AGENT, ACTION) -> SUCCESSOR, LEAST RECENTLY USED FIRST
+        self.foodBits = FoodMemo(foodBits)
+        self.lastState = None # ALL THE ACTIONS OF A NODE ARE LOOKED UP IN A ROW, SO ITS KEY IS KEPT
+        self.lastKey = None
+        self.hits = 0
+        self.misses = 0
+
+    def newSearch(self):
+        "Starts a new search (a new getAction): the food grids of the last one can be let go."
+        self.foodBits.clear()
+        self.lastState = self.lastKey = None
+
+    def stateKey(self, state):
+        if state is self.lastState:
+            return self.lastKey
+        pacman = state.getPacmanState()
+        agents = [(pacman.getPosition(), pacman.getDirection())]
+        for ghostState in state.getGhostStates():
+            agents.append((ghostState.getPosition(), ghostState.getDirection(), ghostState.scaredTimer))
+        self.lastState = state
+        self.lastKey = (tuple(agents), self.foodBits.get(state.getFood()), tuple(state.getCapsules()), state.getScore())
+        return self.lastKey
+
+    def successor(self, state, agentIndex, action):
+        "Returns state.generateSuccessor(agentIndex, action), generating it only if it is not cached."
+        key = (self.stateKey(state), agentIndex, action)
+        successor = self.successors.get(key)
+        if successor is not None:
+            self.successors.move_to_end(key)
+            self.hits += 1
+            return successor
+        self.misses += 1
+        successor = self.successors[key] = state.generateSuccessor(agentIndex, action)
+        if len(self.successors) > self.size:
+            self.successors.popitem(last=False)
+        return successor
+
+class SearchState:
+    """
+    A small, mutable stand-in for a GameState during tree search: the agents'
+    positions, directions and scared timers, the dots as the bits of an int
+    (see foodBits), the capsules and the score gained since the state it was
+    made from.  apply(agentIndex, action) plays a move in place by the same
+    rules as GameState.generateSuccessor and undo() takes the last move back,
+    so a search can walk its whole tree on one object instead of copying a
+    GameState per node.
+
+    It answers the GameState questions that only need those fields
+    (getLegalActions, getScore, isWin, isLose, the positions, the dots and the
+    capsules).  The agents search on its subclass SearchBoard, which adds the
+    rest of what an evaluation function asks for.
+    """
+
+    def __init__(self, gameState):
+        self.walls = gameState.getWalls()
+        self.height = self.walls.height
+        pacman = gameState.getPacmanState()
+        ghostStates = gameState.getGhostStates()
+        self.positions = [pacman.getPosition()] + [ghostState.getPosition() for ghostState in ghostStates]
+        self.directions = [pacman.getDirection()] + [ghostState.getDirection() for ghostState in ghostStates]
+        self.timers = [0] + [ghostState.scaredTimer for ghostState in ghostStates]
+        self.starts = [None] + [ghostState.start for ghostState in ghostStates] # WHERE AN EATEN GHOST GOES BACK TO
+        self.food = foodBits(gameState.getFood())
+        self.numFood = gameState.getNumFood()
+        self.capsules = tuple(gameState.getCapsules())
+        self.baseScore = gameState.getScore()
+        self.scoreDelta = 0
+        self.win = gameState.isWin()
+        self.lose = gameState.isLose()
+        self.cellActions = {} # GRID CELL -> THE ACTIONS THE WALLS ALLOW THERE, STOP INCLUDED
+        self.history = [] # ONE UNDO RECORD PER APPLIED MOVE, NEWEST LAST
+
+    def getNumAgents(self):
+        return len(self.positions)
+
+    def getScore(self):
+        return self.baseScore + self.scoreDelta
+
+    def isWin(self):
+        return self.win
+
+    def isLose(self):
+        return self.lose
+
+    def getPacmanPosition(self):
+        return self.positions[0]
+
+    def getGhostPosition(self, agentIndex):
+        return self.positions[agentIndex]
+
+    def getGhostPositions(self):
+        return self.positions[1:]
+
+    def getCapsules(self):
+        return list(self.capsules)
+
+    def getNumFood(self):
+        return self.numFood
+
+    def hasFood(self, x, y):
+        return bool(self.food >> (x * self.height + y) & 1)
+
+    def getWalls(self):
+        return self.walls
+
+    def hasWall(self, x, y):
+        return self.walls[x][y]
+
+    def getLegalActions(self, agentIndex=0):
+        if self.win or self.lose:
+            return []
+        x, y = self.positions[agentIndex]
+        direction = self.directions[agentIndex]
+        cell = (int(x + 0.5), int(y + 0.5))
+        if abs(x - cell[0]) + abs(y - cell[1]) > Actions.TOLERANCE:
+            return [direction] # A SCARED GHOST HALFWAY BETWEEN TWO CELLS KEEPS GOING
+        actions = self.cellActions.get(cell)
+        if actions is None:
+            actions = self.cellActions[cell] = Actions.getPossibleActions(Configuration(cell, Directions.STOP), self.walls)
+        if agentIndex == 0:
+            return list(actions)
+        # GHOSTS CANNOT STOP, AND CANNOT TURN BACK UNLESS THEY ARE IN A DEAD END
+        actions = [action for action in actions if action != Directions.STOP]
+        reverse = Actions.reverseDirection(direction)
+        if reverse in actions and len(actions) > 1:
+            actions.remove(reverse)
+        return actions
+
+    def apply(self, agentIndex, action):
+        "Plays action for agentIndex in place, like generateSuccessor does on a copy."
+        if self.win or self.lose:
+            raise Exception('Can\'t generate a successor of a terminal state.')
+        if action not in self.getLegalActions(agentIndex):
+            raise Exception('Illegal action ' + str(action))
+        positions, timers = self.positions, self.timers
+        self.history.append((tuple(positions), tuple(self.directions), tuple(timers), self.food, self.numFood, self.capsules, self.scoreDelta))
+        speed = 0.5 if agentIndex > 0 and timers[agentIndex] > 0 else 1.0 # SCARED GHOSTS MOVE AT HALF SPEED
+        dx, dy = Actions.directionToVector(action, speed)
+        x, y = positions[agentIndex]
+        positions[agentIndex] = (x + dx, y + dy)
+        if action != Directions.STOP: # STOPPING KEEPS THE OLD DIRECTION
+            self.directions[agentIndex] = action
+
+        scoreChange = 0
+        if agentIndex == 0:
+            scoreChange += self.consume(nearestPoint(positions[0])) - TIME_PENALTY
+            ghosts = range(1, len(positions))
+        else:
+            if timers[agentIndex] == 1:
+                positions[agentIndex] = nearestPoint(positions[agentIndex])
+            timers[agentIndex] = max(0, timers[agentIndex] - 1)
+            ghosts = (agentIndex,)
+
+        # COLLISIONS: PACMAN EATS A SCARED GHOST OR IS EATEN
+        pacmanPosition = positions[0]
+        for index in ghosts:
+            if manhattanDistance(positions[index], pacmanPosition) <= COLLISION_TOLERANCE:
+                if timers[index] > 0:
+                    scoreChange += 200
+                    positions[index] = self.starts[index].getPosition()
+                    self.directions[index] = self.starts[index].getDirection()
+                    timers[index] = 0
+                elif not self.win:
+                    scoreChange -= 500
+                    self.lose = True
+        self.scoreDelta += scoreChange
+
+    def consume(self, position):
+        # EATS THE DOT OR CAPSULE AT position AND RETURNS THE POINTS IT GIVES
+        x, y = position
+        bit = 1 << (x * self.height + y)
+        points = 0
+        if self.food & bit:
+            self.food &= ~bit
+            self.numFood -= 1
+            points += 10
+            if self.numFood == 0:
+                points += 500
+                self.win = True
+        if position in self.capsules:
+            self.capsules = tuple(capsule for capsule in self.capsules if capsule != position)
+            for index in range(1, len(self.timers)):
+                self.timers[index] = SCARED_TIME
+        return points
+
+    def undo(self):
+        "Takes back the last applied move."
+        positions, directions, timers, self.food, self.numFood, self.capsules, self.scoreDelta = self.history.pop()
+        self.positions[:] = positions
+        self.directions[:] = directions
+        self.timers[:] = timers
+        self.win = self.lose = False # ONLY NON-TERMINAL STATES CAN BE MOVED FROM
+
+class SearchBoard(SearchState):
+    """
+    A SearchState that also answers the rest of the GameState questions an
+    evaluation function asks (getFood, getPacmanState, getGhostStates and
+    getGhostState), so the agents can search on one board with apply/undo
+    where they used to call generateSuccessor: see
+    MultiAgentSearchAgent.successors.  The food grids and agent states it
+    hands out are built from its fields and must not be changed.
+
+    With check=True it also keeps the GameStates that generateSuccessor gives
+    for the same moves and, after every apply and undo, raises an Exception
+    naming the first thing the board got different from them.
+    """
+
+    def __init__(self, gameState, check=False):
+        SearchState.__init__(self, gameState)
+        self.grids = {} # FOOD BITS -> THE FOOD Grid HANDED OUT FOR THEM
+        self.shadows = [gameState] if check else None # THE GameStates OF THE MOVES APPLIED SO FAR, WHEN CHECKING
+
+    def getFood(self):
+        grid = self.grids.get(self.food)
+        if grid is None:
+            grid = self.grids[self.food] = Grid(self.walls.width, self.height)
+            bits, index = self.food, 0
+            while bits:
+                if bits & 1:
+                    grid[index // self.height][index % self.height] = True
+                bits >>= 1
+                index += 1
+        return grid
+
+    def getGhostState(self, agentIndex):
+        agentState = AgentState(self.starts[agentIndex], False)
+        agentState.configuration = Configuration(self.positions[agentIndex], self.directions[agentIndex])
+        agentState.scaredTimer = self.timers[agentIndex]
+        return agentState
+
+    def getGhostStates(self):
+        return [self.getGhostState(index) for index in range(1, len(self.positions))]
+
+    def getPacmanState(self):
+        configuration = Configuration(self.positions[0], self.directions[0])
+        return AgentState(configuration, True)
+
+    def apply(self, agentIndex, action):
+        if self.shadows is not None:
+            self.check('before ' + str(action) + ' of agent ' + str(agentIndex), agentIndex)
+            self.shadows.append(self.shadows[-1].generateSuccessor(agentIndex, action))
+        SearchState.apply(self, agentIndex, action)
+        if self.shadows is not None:
+            self.check('after ' + str(action) + ' of agent ' + str(agentIndex))
+
+    def undo(self):
+        SearchState.undo(self)
+        if self.shadows is not None:
+            self.shadows.pop()
+            self.check('after an undo')
+
+    def check(self, when, agentIndex=None):
+        # COMPARES THE BOARD WITH THE GameState generateSuccessor GAVE FOR THE SAME MOVES
+        gameState = self.shadows[-1]
+        ghostStates = gameState.getGhostStates()
+        pacman = gameState.getPacmanState()
+        expected = [
+            ('positions', [pacman.getPosition()] + [ghostState.getPosition() for ghostState in ghostStates], self.positions),
+            ('directions', [pacman.getDirection()] + [ghostState.getDirection() for ghostState in ghostStates], self.directions),
+            ('scared timers', [0] + [ghostState.scaredTimer for ghostState in ghostStates], self.timers),
+            ('food', gameState.getFood().asList(), self.getFood().asList()),
+            ('capsules', sorted(gameState.getCapsules()), sorted(self.capsules)),
+            ('score', gameState.getScore(), self.getScore()),
+            ('win', gameState.isWin(), self.win),
+            ('lose', gameState.isLose(), self.lose),
+        ]
+        if agentIndex is not None:
+            expected.append(('legal actions', gameState.getLegalActions(agentIndex), self.getLegalActions(agentIndex)))
+        for name, value, boardValue in expected:
+            if value != boardValue:
+                raise Exception('SearchBoard differs from generateSuccessor in its %s %s: %s instead of %s' % (name, when, boardValue, value))
+
 class MultiAgentSearchAgent(Agent):
     """
     This class provides some common elements to all of your
@@ -121,12 +553,66 @@ class MultiAgentSearchAgent(Agent):
     Note: this is an abstract class: one that should not be instantiated.  It's
     only partially specified, and designed to be extended.  Agent (game.py)
     is another abstract class.
+
+    WITH ttSize > 0 (E.G. -a ttSize=65536) THE AGENTS REUSE SEARCH RESULTS
+    THROUGH A TranspositionTable OF THAT MANY SLOTS, KEPT FOR THE WHOLE GAME.
+    WITH cacheSize > 0 THEY KEEP THAT MANY SUCCESSOR STATES IN A SuccessorCache,
+    ALSO FOR THE WHOLE GAME, INSTEAD OF GENERATING THEM AGAIN.
+    WITH board=1 THEY SEARCH ON ONE SearchBoard WITH apply/undo INSTEAD OF
+    GENERATING A GameState PER NODE (cacheSize THEN HAS NOTHING TO DO), AND WITH
+    board=check THEY ALSO CHECK EVERY MOVE OF THE BOARD AGAINST generateSuccessor.
+    THE EVALUATION FUNCTION THEN GETS THE BOARD, WHICH ANSWERS THE SAME QUESTIONS.
     """
 
-    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2'):
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', ttSize = '0', cacheSize = '0', board = '0'):
         self.index = 0 # Pacman is always agent index 0
         self.evaluationFunction = util.lookup(evalFn, globals())
         self.depth = int(depth)
+        self.transpositions = TranspositionTable(int(ttSize)) if int(ttSize) > 0 else None
+        self.successorCache = SuccessorCache(int(cacheSize)) if int(cacheSize) > 0 else None
+        if board not in ('0', '1', 'check'):
+            raise Exception('board must be 0, 1 or check, not ' + str(board))
+        self.board = board
+
+    def newSearch(self):
+        "CALLED AT THE START OF EVERY getAction."
+        if self.transpositions is not None:
+            self.transpositions.newSearch()
+        if self.successorCache is not None:
+            self.successorCache.newSearch()
+
+    def generateSuccessor(self, state, agentIndex, action):
+        "RETURNS state.generateSuccessor(agentIndex, action), FROM THE SUCCESSOR CACHE IF THERE IS ONE."
+        if self.successorCache is None:
+            return state.generateSuccessor(agentIndex, action)
+        return self.successorCache.successor(state, agentIndex, action)
+
+    def searchState(self, gameState):
+        "RETURNS WHAT TO SEARCH FROM gameState ON: gameState ITSELF, OR A NEW SearchBoard IN board MODE."
+        if self.board == '0':
+            return gameState
+        return SearchBoard(gameState, check=self.board == 'check')
+
+    def successors(self, state, agentIndex, actions, generated=None):
+        """
+        YIELDS (ACTION, SUCCESSOR) FOR EVERY ACTION OF agentIndex IN actions.  ON A
+        SearchBoard THE SUCCESSOR IS THE BOARD ITSELF WITH THE ACTION APPLIED, UNTIL
+        THE NEXT ONE IS ASKED FOR (OR THE LOOP IS LEFT); OTHERWISE IT IS A GameState,
+        TAKEN FROM generated (ACTION -> SUCCESSOR) IF IT IS THERE.
+        """
+        if isinstance(state, SearchBoard):
+            for action in actions:
+                state.apply(agentIndex, action)
+                try:
+                    yield action, state
+                finally:
+                    state.undo()
+        else:
+            for action in actions:
+                successor = generated.get(action) if generated else None
+                if successor is None:
+                    successor = self.generateSuccessor(state, agentIndex, action)
+                yield action, successor
 
 
 class MinimaxAgent(MultiAgentSearchAgent):
@@ -138,14 +624,14 @@ class MinimaxAgent(MultiAgentSearchAgent):
         """
         RETURNS THE MINIMAX ACTION FROM THE CURRENT GAMESTATE USING SELF.DEPTH AND SELF.EVALUATIONFUNCTION.
         """
+        self.newSearch()
         # GET LEGAL ACTIONS FOR PACMAN
         legalActions = gameState.getLegalActions(0)
         bestScore = -float('inf')
         bestAction = None
 
         # EVALUATE EACH ACTION USING MINIMAX
-        for action in legalActions:
-            successor = gameState.generateSuccessor(0, action)
+        for action, successor in self.successors(self.searchState(gameState), 0, legalActions):
             score = self.minValue(successor, 0, 1)
             if score > bestScore:
                 bestScore = score
@@ -157,105 +643,265 @@ class MinimaxAgent(MultiAgentSearchAgent):
         # TERMINAL STATE OR MAX DEPTH REACHED
         if state.isWin() or state.isLose() or depth == self.depth:
             return self.evaluationFunction(state)
+        table = self.transpositions
+        if table is not None:
+            key = table.key(state, 0)
+            entry = table.probe(key, self.depth - depth, state.getScore())
+            if entry is not None:
+                return entry[0]
         v = -float('inf')
         legalActions = state.getLegalActions(0)
         if not legalActions:
             return self.evaluationFunction(state)
         # EVALUATE SUCCESSOR STATES FOR PACMAN
-        for action in legalActions:
-            successor = state.generateSuccessor(0, action)
-            v = max(v, self.minValue(successor, depth, 1))
+        bestAction = None
+        for action, successor in self.successors(state, 0, legalActions):
+            value = self.minValue(successor, depth, 1)
+            if value > v:
+                v, bestAction = value, action
+        if table is not None:
+            table.store(key, self.depth - depth, v, EXACT, bestAction, state.getScore())
         return v
 
     def minValue(self, state, depth, agentIndex):
         # TERMINAL STATE REACHED
         if state.isWin() or state.isLose():
             return self.evaluationFunction(state)
+        table = self.transpositions
+        if table is not None:
+            key = table.key(state, agentIndex)
+            entry = table.probe(key, self.depth - depth, state.getScore())
+            if entry is not None:
+                return entry[0]
         v = float('inf')
         legalActions = state.getLegalActions(agentIndex)
         if not legalActions:
             return self.evaluationFunction(state)
         numAgents = state.getNumAgents()
         # EVALUATE SUCCESSOR STATES FOR GHOSTS
-        for action in legalActions:
-            successor = state.generateSuccessor(agentIndex, action)
+        for action, successor in self.successors(state, agentIndex, legalActions):
             if agentIndex == numAgents - 1:
                 # LAST GHOST; NEXT AGENT IS PACMAN, INCREMENT DEPTH
                 v = min(v, self.maxValue(successor, depth + 1))
             else:
                 # NEXT GHOST
                 v = min(v, self.minValue(successor, depth, agentIndex + 1))
+        if table is not None:
+            table.store(key, self.depth - depth, v, EXACT, None, state.getScore())
         return v
     
     
+class SearchTimeout(Exception):
+    "RAISED FROM INSIDE A SEARCH WHEN ITS TIME BUDGET RUNS OUT."
+
 class AlphaBetaAgent(MultiAgentSearchAgent):
     """
     YOUR MINIMAX AGENT WITH ALPHA-BETA PRUNING (QUESTION 3)
+
+    WITH timeLimit > 0 (SECONDS PER MOVE, E.G. -a timeLimit=0.05) THE AGENT IGNORES
+    depth AND DEEPENS ITERATIVELY (1, 2, 3, ... PLIES) UNTIL THE TIME RUNS OUT, THEN
+    PLAYS THE BEST MOVE OF THE LAST DEPTH IT COMPLETED.  EVERY ITERATION TRIES THE
+    ROOT MOVES IN THE ORDER OF THEIR SCORES IN THE PREVIOUS ONE.
+
+    ordering CHOOSES HOW THE MOVES BELOW THE ROOT ARE ORDERED, AS A +-SEPARATED LIST
+    (E.G. -a ordering=pv+killer+history+static), MOST IMPORTANT FIRST:
+      pv       THE BEST MOVE STORED IN THE TRANSPOSITION TABLE, FROM A SEARCH OF ANY DEPTH (NEEDS ttSize)
+      killer   THE LAST TWO MOVES THAT CAUSED A CUTOFF AT THE SAME PLY
+      history  MOVES (PER AGENT AND POSITION) THAT OFTEN CAUSED CUTOFFS, WEIGHTED BY DEPTH
+      static   THE EVALUATION FUNCTION OF THE SUCCESSORS (BEST FOR THE AGENT TO MOVE FIRST)
+    THE DEFAULT '' KEEPS getLegalActions ORDER.  searchStats COUNTS THE EXPANDED NODES,
+    THE CUTOFFS AND THE CUTOFFS CAUSED BY THE FIRST MOVE TRIED, OVER THE WHOLE GAME.
     """
 
+    ORDERINGS = ('pv', 'killer', 'history', 'static')
+
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', ttSize = '0', timeLimit = '0', ordering = '', cacheSize = '0', board = '0'):
+        MultiAgentSearchAgent.__init__(self, evalFn, depth, ttSize, cacheSize, board)
+        self.timeLimit = float(timeLimit)
+        self.ordering = [name for name in ordering.split('+') if name]
+        for name in self.ordering:
+            if name not in self.ORDERINGS:
+                raise Exception('Unknown move ordering: ' + name)
+        if 'pv' in self.ordering and self.transpositions is None:
+            raise Exception('Move ordering pv needs a transposition table (ttSize > 0)')
+        self.killers = {} # PLY -> UP TO TWO MOVES THAT CAUSED A CUTOFF THERE, NEWEST FIRST
+        self.history = {} # (AGENT, POSITION, ACTION) -> CUTOFF SCORE
+        self.searchStats = {'nodes': 0, 'cutoffs': 0, 'firstMoveCutoffs': 0}
+
     def getAction(self, gameState: GameState):
         """
         RETURNS THE MINIMAX ACTION USING SELF.DEPTH AND SELF.EVALUATIONFUNCTION
         """
+        self.newSearch()
+        self.killers = {} # PLIES ARE COUNTED FROM THE ROOT, SO LAST TURN'S KILLERS DO NOT APPLY
+        # OLD CUTOFFS COUNT LESS AND LESS; MOVES WHOSE SCORE FADES TO 0 ARE FORGOTTEN
+        self.history = {move: score // 2 for move, score in self.history.items() if score > 1}
+
+        # GET LEGAL ACTIONS FOR PACMAN
+        legalActions = gameState.getLegalActions(0)
+        if not legalActions:
+            return None
+        if self.timeLimit <= 0:
+            return self.searchRoot(gameState, self.depth, legalActions)[0]
+
+        # ANYTIME MODE: ITERATIVE DEEPENING UNTIL THE DEADLINE
+        deadline = time.time() + self.timeLimit
+        bestAction = legalActions[0] # IF NOT EVEN ONE PLY FITS IN THE BUDGET
+        order = list(legalActions)
+        maxDepth = 1
+        while True:
+            try:
+                action, scores, cutoffReached = self.searchRoot(gameState, maxDepth, order, deadline)
+            except SearchTimeout:
+                break # THE UNFINISHED ITERATION IS THROWN AWAY
+            if action is not None:
+                bestAction = action
+            if not cutoffReached:
+                break # THE WHOLE TREE FIT IN THIS DEPTH, DEEPER SEARCHES WOULD FIND THE SAME
+            order.sort(key=lambda action: -scores[action]) # STABLE, SO THE BEST MOVE STAYS IN FRONT OF ITS TIES
+            maxDepth += 1
+        return bestAction
+
+    def searchRoot(self, gameState: GameState, maxDepth, legalActions, deadline=None):
+        """
+        SEARCHES legalActions (IN THAT ORDER) maxDepth PLIES DEEP AND RETURNS THE BEST
+        ACTION, THE SCORE OF EVERY ACTION AND WHETHER ANY NODE WAS CUT OFF BY THE DEPTH
+        LIMIT.  RAISES SearchTimeout ONCE time.time() PASSES deadline.
+        """
+        table = self.transpositions
+        cutoffReached = [False]
+        stats = self.searchStats
+        ordering = self.ordering
+
         # DEFINE ALPHA-BETA FUNCTION INSIDE GETACTION
         def alphaBeta(state, depth, agentIndex, alpha, beta):
             # CHECK IF STATE IS WIN, LOSE, OR MAX DEPTH REACHED
-            if state.isWin() or state.isLose() or depth == self.depth:
+            if state.isWin() or state.isLose():
+                return self.evaluationFunction(state)
+            if depth == maxDepth:
+                cutoffReached[0] = True
                 return self.evaluationFunction(state)
+            if deadline is not None and time.time() > deadline:
+                raise SearchTimeout()
 
+            if table is not None:
+                key = table.key(state, agentIndex)
+                value, pvMove = table.cutoff(key, maxDepth - depth, alpha, beta, state.getScore())
+                if value is not None:
+                    cutoffReached[0] = True # THE STORED SUBTREE MAY HAVE BEEN CUT OFF, SO DO NOT STOP DEEPENING
+                    return value
+                v, move = expand(state, depth, agentIndex, alpha, beta, pvMove)
+                table.store(key, maxDepth - depth, v, boundType(v, alpha, beta), move, state.getScore())
+                return v
+            return expand(state, depth, agentIndex, alpha, beta)[0]
+
+        def orderMoves(state, depth, agentIndex, position, legalActions, pvMove):
+            # RETURNS THE ACTIONS IN THE ORDER TO TRY THEM AND THE SUCCESSORS GENERATED ON THE WAY
+            if not ordering:
+                return legalActions, None
+            ply = depth * state.getNumAgents() + agentIndex
+            killers = self.killers.get(ply, ())
+            values = {}
+            if 'static' in ordering:
+                generated = {}
+                for action, successor in self.successors(state, agentIndex, legalActions):
+                    values[action] = self.evaluationFunction(successor)
+                    if not isinstance(state, SearchBoard):
+                        generated[action] = successor
+            else:
+                generated = None
+            moves = []
+            for index, action in enumerate(legalActions):
+                rank = []
+                for name in ordering:
+                    if name == 'pv':
+                        rank.append(action != pvMove)
+                    elif name == 'killer':
+                        rank.append(killers.index(action) if action in killers else len(killers))
+                    elif name == 'history':
+                        rank.append(-self.history.get((agentIndex, position, action), 0))
+                    else: # static
+                        rank.append(-values[action] if agentIndex == 0 else values[action])
+                rank.append(index) # TIES KEEP getLegalActions ORDER
+                moves.append((rank, action))
+            moves.sort(key=lambda move: move[0])
+            return [action for _, action in moves], generated
+
+        def recordCutoff(state, depth, agentIndex, position, action, tried):
+            # REMEMBERS A MOVE THAT PRUNED THE REST OF ITS SIBLINGS
+            stats['cutoffs'] += 1
+            if tried == 1:
+                stats['firstMoveCutoffs'] += 1
+            if 'killer' in ordering:
+                ply = depth * state.getNumAgents() + agentIndex
+                killers = self.killers.get(ply, [])
+                if action not in killers:
+                    self.killers[ply] = [action] + killers[:1]
+            if 'history' in ordering:
+                move = (agentIndex, position, action)
+                self.history[move] = self.history.get(move, 0) + (maxDepth - depth) ** 2
+
+        def expand(state, depth, agentIndex, alpha, beta, pvMove=None):
+            # RETURNS THE VALUE AND THE BEST MOVE FOUND
+            stats['nodes'] += 1
             # GET LEGAL ACTIONS FOR CURRENT AGENT
             legalActions = state.getLegalActions(agentIndex)
             if not legalActions:
-                return self.evaluationFunction(state)
+                return self.evaluationFunction(state), None
+            bestMove = None
+            position = None # ONLY THE HISTORY HEURISTIC LOOKS AT POSITIONS (GAME-TREE STATES MAY HAVE NONE)
+            if 'history' in ordering:
+                # READ BEFORE THE LOOP: ON A SearchBoard state HOLDS THE SUCCESSOR INSIDE IT
+                position = state.getPacmanPosition() if agentIndex == 0 else state.getGhostPosition(agentIndex)
+            actions, generated = orderMoves(state, depth, agentIndex, position, legalActions, pvMove)
             # PACMAN'S TURN (MAXIMIZER)
             if agentIndex == 0:
                 v = -float('inf')
-                for action in legalActions:
-                    successor = state.generateSuccessor(agentIndex, action)
-                    v = max(v, alphaBeta(successor, depth, agentIndex + 1, alpha, beta))
+                for tried, (action, successor) in enumerate(self.successors(state, agentIndex, actions, generated), 1):
+                    value = alphaBeta(successor, depth, agentIndex + 1, alpha, beta)
+                    if value > v:
+                        v, bestMove = value, action
                     if v > beta:
-                        return v  # PRUNE
+                        recordCutoff(state, depth, agentIndex, position, action, tried)
+                        return v, bestMove  # PRUNE
                     alpha = max(alpha, v)
-                return v
+                return v, bestMove
             else:
                 # GHOSTS' TURN (MINIMIZER)
                 v = float('inf')
-                for action in legalActions:
-                    successor = state.generateSuccessor(agentIndex, action)
+                for tried, (action, successor) in enumerate(self.successors(state, agentIndex, actions, generated), 1):
                     nextAgent = agentIndex + 1
                     nextDepth = depth
                     if nextAgent == state.getNumAgents():
                         nextAgent = 0  # BACK TO PACMAN
                         nextDepth += 1  # INCREMENT DEPTH
-                    v = min(v, alphaBeta(successor, nextDepth, nextAgent, alpha, beta))
+                    value = alphaBeta(successor, nextDepth, nextAgent, alpha, beta)
+                    if value < v:
+                        v, bestMove = value, action
                     if v < alpha:
-                        return v  # PRUNE
+                        recordCutoff(state, depth, agentIndex, position, action, tried)
+                        return v, bestMove  # PRUNE
                     beta = min(beta, v)
-                return v
+                return v, bestMove
 
         # INITIALIZE VARIABLES
         alpha = -float('inf')
         beta = float('inf')
         bestAction = None
         bestScore = -float('inf')
-
-        # GET LEGAL ACTIONS FOR PACMAN
-        legalActions = gameState.getLegalActions(0)
-        if not legalActions:
-            return None
+        scores = {}
 
         # EVALUATE EACH ACTION USING ALPHA-BETA PRUNING
-        for action in legalActions:
-            successor = gameState.generateSuccessor(0, action)
-            score = alphaBeta(successor, 0, 1, alpha, beta)
+        for action, successor in self.successors(self.searchState(gameState), 0, legalActions):
+            score = scores[action] = alphaBeta(successor, 0, 1, alpha, beta)
             if score > bestScore:
                 bestScore = score
                 bestAction = action
             if bestScore > beta:
-                return bestAction  # PRUNE
+                break  # PRUNE
             alpha = max(alpha, bestScore)
 
-        return bestAction
+        return bestAction, scores, cutoffReached[0]
 
 class ExpectimaxAgent(MultiAgentSearchAgent):
     """
@@ -270,6 +916,8 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         LEGAL MOVES.
         """
         # IMPLEMENT EXPECTIMAX SEARCH
+        table = self.transpositions
+        self.newSearch()
 
         # DEFINE THE EXPECTIMAX FUNCTION
         def expectimax(state, depth, agentIndex):
@@ -277,6 +925,17 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
             if state.isWin() or state.isLose() or depth == self.depth:
                 return self.evaluationFunction(state)
 
+            if table is not None:
+                key = table.key(state, agentIndex)
+                entry = table.probe(key, self.depth - depth, state.getScore())
+                if entry is not None:
+                    return entry[0]
+                value = expectation(state, depth, agentIndex)
+                table.store(key, self.depth - depth, value, EXACT, None, state.getScore())
+                return value
+            return expectation(state, depth, agentIndex)
+
+        def expectation(state, depth, agentIndex):
             # GET LEGAL ACTIONS FOR CURRENT AGENT
             legalActions = state.getLegalActions(agentIndex)
             if not legalActions:
@@ -290,9 +949,7 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
             if agentIndex == 0:
                 # PACMAN'S TURN (MAXIMIZER)
                 maxValue = -float('inf')
-                for action in legalActions:
-                    # GENERATE SUCCESSOR STATE
-                    successor = state.generateSuccessor(agentIndex, action)
+                for action, successor in self.successors(state, agentIndex, legalActions):
                     # RECURSIVELY CALL EXPECTIMAX
                     value = expectimax(successor, nextDepth, nextAgent)
                     maxValue = max(maxValue, value)
@@ -300,9 +957,7 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
             else:
                 # GHOSTS' TURN (EXPECTATION NODE)
                 totalValue = 0
-                for action in legalActions:
-                    # GENERATE SUCCESSOR STATE
-                    successor = state.generateSuccessor(agentIndex, action)
+                for action, successor in self.successors(state, agentIndex, legalActions):
                     # RECURSIVELY CALL EXPECTIMAX
                     value = expectimax(successor, nextDepth, nextAgent)
                     totalValue += value
@@ -316,9 +971,7 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         legalActions = gameState.getLegalActions(0)  # PACMAN'S LEGAL ACTIONS
 
         # ITERATE OVER LEGAL ACTIONS TO FIND THE BEST ONE
-        for action in legalActions:
-            # GENERATE SUCCESSOR STATE
-            successor = gameState.generateSuccessor(0, action)
+        for action, successor in self.successors(self.searchState(gameState), 0, legalActions):
             # CALL EXPECTIMAX FOR THE SUCCESSOR STATE
             score = expectimax(successor, 0, 1)
             # UPDATE BEST SCORE AND BEST ACTION
@@ -0,0 +1,74 @@
+"""
+Runs the search agents on small hand-built game trees.  The tree states only
+offer the interface the autograder's game-tree states offer, so an agent that
+asks a state for anything else (positions, food, ghosts) fails here.
+"""
+
+import unittest
+
+import multiAgents
+
+
+class Tree:
+    """
+    A game-tree state.  children maps an action to the child Tree; a state
+    without children is a leaf worth score.
+    """
+
+    def __init__(self, numAgents, agentIndex, children=None, score=0):
+        self.numAgents = numAgents
+        self.agentIndex = agentIndex
+        self.children = children or {}
+        self.score = score
+
+    def getNumAgents(self):
+        return self.numAgents
+
+    def isWin(self):
+        return False
+
+    def isLose(self):
+        return False
+
+    def getScore(self):
+        return self.score
+
+    def getLegalActions(self, agentIndex=0):
+        assert agentIndex == self.agentIndex, 'agent %d moved out of turn' % agentIndex
+        return list(self.children)
+
+    def generateSuccessor(self, agentIndex, action):
+        assert agentIndex == self.agentIndex, 'agent %d moved out of turn' % agentIndex
+        return self.children[action]
+
+
+def ghostNode(scores):
+    return Tree(2, 1, {'g%d' % i: Tree(2, 0, score=score) for i, score in enumerate(scores)})
+
+def pacmanRoot():
+    # LEFT: MIN 3, MEAN 4.  RIGHT: MIN 2, MEAN 7.
+    return Tree(2, 0, {'Left': ghostNode([3, 5]), 'Right': ghostNode([12, 2])})
+
+
+class DefaultOptionsTest(unittest.TestCase):
+
+    def testMinimax(self):
+        self.assertEqual(multiAgents.MinimaxAgent(depth='1').getAction(pacmanRoot()), 'Left')
+
+    def testAlphaBeta(self):
+        self.assertEqual(multiAgents.AlphaBetaAgent(depth='1').getAction(pacmanRoot()), 'Left')
+
+    def testAlphaBetaKillerOrdering(self):
+        agent = multiAgents.AlphaBetaAgent(depth='1', ordering='killer')
+        self.assertEqual(agent.getAction(pacmanRoot()), 'Left')
+
+    def testExpectimax(self):
+        self.assertEqual(multiAgents.ExpectimaxAgent(depth='1').getAction(pacmanRoot()), 'Right')
+
+    def testPvOrderingNeedsTranspositionTable(self):
+        with self.assertRaises(Exception):
+            multiAgents.AlphaBetaAgent(ordering='pv')
+
+
+if __name__ == '__main__':
+    unittest.main()